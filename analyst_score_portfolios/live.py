@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Run from this folder (./score, ./price_data) without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from report_portfolios.analyst.live import cli
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,155 @@
+"""
+Offline benchmark of both packages on deterministic synthetic data.
+
+For every report count, a data set is generated with synthetic.generate and each strategy family
+runs its pipeline on it in a separate process (run_package.py). Stage timings and the evaluation
+metrics of every strategy are written to --output and compared with --baseline: a stage that
+got slower than --slowdown times its baseline is reported, and metrics that differ from the
+baseline, or engines that disagree with each other, fail the run. Baseline runs generated with
+other parameters (sizes, months or seed) are not compared.
+
+With --reference, the original implementation also runs on every data set (run_reference.py)
+and its metrics take the place of the baseline's, so the package is checked against the code it
+replaced rather than against itself. The committed baseline.json was saved this way with the
+default parameters:
+
+    git worktree add ../../original $(git rev-list --max-parents=0 HEAD)
+    python run.py --reference ../../original --save_baseline
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+from synthetic import generate
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_package(package, data_dir, params, engines, reference=None):
+    """Runs run_package.py (run_reference.py on the reference checkout, if given) for one package in a fresh run directory and returns its report."""
+    workdir = os.path.join(data_dir, f'run_{package}' if reference is None else f'reference_{package}')
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(os.path.join(workdir, 'score'))
+    shutil.copy(os.path.join(data_dir, 'score', f'{package}.csv'), os.path.join(workdir, 'score'))
+    output = os.path.join(workdir, 'report.json')
+
+    command = ['--package', package, '--workdir', workdir, '--data_dir', data_dir,
+               '--first_month', params['first_month'], '--end_month', params['end_month'], '--output', output]
+    if reference is None:
+        command = [sys.executable, os.path.join(BENCHMARK_DIR, 'run_package.py'), *command, '--engines', *engines]
+    else:
+        command = [sys.executable, os.path.join(BENCHMARK_DIR, 'run_reference.py'), *command, '--source', reference]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{package} {'reference' if reference else 'benchmark'} failed:\n{completed.stderr[-4000:]}")
+    with open(output) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, slowdown, min_seconds=0.05, rtol=1e-12):
+    """
+    Compares results with baseline runs of the same size and package.
+
+    Stages that took less than min_seconds in the baseline are too noisy to compare and are
+    skipped, and so are baseline runs whose generation parameters differ from the result's.
+
+    Returns:
+    tuple: Lines describing stage slowdowns, lines describing metric or engine mismatches, and
+    the keys that were not compared.
+    """
+    slower, mismatches, skipped = [], [], []
+    for key, run in results.items():
+        for name, difference in run['engine_diff'].items():
+            if not difference <= rtol:
+                mismatches.append(f"{key} {name}: engines differ by {difference}")
+        if key not in baseline or baseline[key]['params'] != run['params']:
+            skipped.append(key)
+            continue
+        reference = baseline[key]
+        for stage, seconds in run['stages'].items():
+            previous = reference['stages'].get(stage)
+            if previous and previous >= min_seconds and seconds > slowdown * previous:
+                slower.append(f"{key} {stage}: {previous:.3f}s -> {seconds:.3f}s ({seconds / previous:.2f}x)")
+        for strategy_name, metrics in reference['metrics'].items():
+            for metric, value in metrics.items():
+                current = run['metrics'].get(strategy_name, {}).get(metric)
+                if current is None or not np.isclose(current, value, rtol=rtol, atol=0, equal_nan=True):
+                    mismatches.append(f"{key} {strategy_name} {metric}: {value} -> {current}")
+    return slower, mismatches, skipped
+
+
+def main(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix='portfolio_bench_')
+    results, references = {}, {}
+    for n_reports in args.reports:
+        data_dir = os.path.join(workdir, f'reports_{n_reports}')
+        params = generate(data_dir, n_reports, args.codes, args.first_month, args.end_month, args.seed)
+        for package in args.packages:
+            key = f'{package}/{n_reports}'
+            print(f"Running {key}...", flush=True)
+            results[key] = {'params': params, **run_package(package, data_dir, params, args.engines)}
+            for stage, seconds in results[key]['stages'].items():
+                print(f"  {stage:<40} {seconds:9.3f}s")
+            if args.reference:
+                print(f"Running {key} on the reference...", flush=True)
+                references[key] = {'params': params, **run_package(package, data_dir, params, args.engines, args.reference)}
+        if not args.keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {args.output}")
+
+    if args.reference:
+        # Timings stay those of the package; metrics are the original implementation's
+        baseline = {key: {**run, 'metrics': references[key]['metrics'], 'metrics_source': 'reference'} for key, run in results.items()}
+        if args.save_baseline:
+            with open(args.baseline, 'w') as f:
+                json.dump(baseline, f, indent=1)
+            print(f"Baseline written to {args.baseline}")
+    elif args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        baseline = {}
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        baseline = {}
+
+    slower, mismatches, skipped = compare(results, baseline, args.slowdown, args.min_seconds)
+    if skipped:
+        print(f"Not compared (no baseline with the same parameters): {', '.join(skipped)}")
+    for line in slower:
+        print(f"SLOWER   {line}")
+    for line in mismatches:
+        print(f"MISMATCH {line}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark both packages offline on synthetic data.')
+    parser.add_argument('--reports', nargs='+', type=int, default=[1000, 10000], help='Report counts to generate (up to 1000000)')
+    parser.add_argument('--codes', type=int, default=500, help='Number of synthetic stock codes')
+    parser.add_argument('--first_month', default='2016-01', help='First score month')
+    parser.add_argument('--end_month', default='2018-01', help='Month after the last holding month')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--packages', nargs='+', default=['sentiment', 'analyst'], choices=['sentiment', 'analyst'])
+    parser.add_argument('--engines', nargs='+', default=['matrix', 'per_code'], choices=['matrix', 'per_code'],
+                        help='Return engines to time; the first one is evaluated and the others are checked against it')
+    parser.add_argument('--workdir', default=None, help='Where data sets are generated (default: a temporary directory)')
+    parser.add_argument('--keep_data', action='store_true', help='Keep the generated data sets')
+    parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'results', 'latest.json'))
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARK_DIR, 'baseline.json'))
+    parser.add_argument('--save_baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--reference', default=None, metavar='CHECKOUT',
+                        help='Also run the original implementation from this checkout and check the metrics against it (see run_reference.py)')
+    parser.add_argument('--slowdown', type=float, default=1.25, help='Report stages slower than this factor of the baseline')
+    parser.add_argument('--min_seconds', type=float, default=0.05, help='Do not compare stages shorter than this in the baseline')
+    sys.exit(main(parser.parse_args()))
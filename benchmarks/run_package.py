@@ -0,0 +1,136 @@
+"""
+Times the pipeline stages of one strategy family on a synthetic data set.
+
+run.py starts this script once per family in its own process, so that each one starts with
+cold caches (price panel, score aggregates) and their timings do not depend on run order.
+"""
+import os
+os.environ.setdefault('TQDM_DISABLE', '1')
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+
+class StageTimer:
+    """Collects the wall time of named stages."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def __call__(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+        return result
+
+
+def engine_difference(reference, other):
+    """Returns the largest absolute difference between two month -> daily returns dicts (inf if their dates differ)."""
+    largest = 0.0
+    for month in reference:
+        a, b = reference[month].sort_index(kind='stable'), other[month].sort_index(kind='stable')
+        if len(a) != len(b) or not a.index.equals(b.index):
+            return float('inf')
+        a, b = a.to_numpy(dtype=np.float64), b.to_numpy(dtype=np.float64)
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            return float('inf')
+        if len(a):
+            largest = max(largest, float(np.nanmax(np.abs(a - b), initial=0.0)))
+    return largest
+
+
+def split_by_month(port_daily_returns, months):
+    """Splits a daily returns Series into month -> Series for engine_difference."""
+    labels = port_daily_returns.index.strftime('%Y-%m')
+    return {month: port_daily_returns[labels == month] for month in months}
+
+
+def run_sentiment(timer, months, kospi_daily_returns, engines, transaction_cost, quantile):
+    from report_portfolios.sentiment import STRATEGIES, strategy
+    from report_portfolios.sentiment.main import load_dataset
+    from report_portfolios.evaluation import evaluate_portfolio
+
+    timer('load_scores_cold', load_dataset, 'sentiment', f'{months[0]}-01', None)
+    df = timer('load_scores_warm', load_dataset, 'sentiment', f'{months[0]}-01', None)
+    results = {'metrics': {}, 'engine_diff': {}}
+    for strategy_name in STRATEGIES:
+        long_codes, short_codes = timer(f'{strategy_name}/select_codes', strategy.select_codes,
+                                        strategy_name, 'sentiment', months[1:], df, quantile)
+        returns = {}
+        for engine in engines:
+            returns[engine] = timer(f'{strategy_name}/returns_{engine}', strategy.monthly_portfolio_returns,
+                                    months[1:], long_codes, short_codes, engine, transaction_cost)
+        port_daily_returns = pd.concat(returns[engines[0]].values()).sort_index()
+        results['metrics'][strategy_name] = timer(f'{strategy_name}/evaluate', evaluate_portfolio, port_daily_returns,
+                                                  kospi_daily_returns, 'sentiment', verbose=False)
+        for engine in engines[1:]:
+            results['engine_diff'][f'{strategy_name}/{engine}'] = engine_difference(returns[engines[0]], returns[engine])
+    return df, results
+
+
+def run_analyst(timer, months, kospi_daily_returns, engines, transaction_cost):
+    from report_portfolios.analyst import STRATEGIES, strategy
+    from report_portfolios.analyst.main import load_dataset
+    from report_portfolios.evaluation import evaluate_portfolio
+
+    timer('load_scores_cold', load_dataset, 'analyst')
+    df = timer('load_scores_warm', load_dataset, 'analyst')
+    results = {'metrics': {}, 'engine_diff': {}}
+    for strategy_name in STRATEGIES:
+        signal = timer(f'{strategy_name}/signals', strategy.generate_buy_signals, strategy_name, df)
+        returns = {}
+        for engine in engines:
+            returns[engine] = timer(f'{strategy_name}/returns_{engine}', strategy.compute_daily_returns,
+                                    signal, months, transaction_cost, engine)
+        results['metrics'][strategy_name] = timer(f'{strategy_name}/evaluate', evaluate_portfolio, returns[engines[0]],
+                                                  kospi_daily_returns, 'analyst', verbose=False)
+        for engine in engines[1:]:
+            results['engine_diff'][f'{strategy_name}/{engine}'] = engine_difference(
+                split_by_month(returns[engines[0]], months[1:]), split_by_month(returns[engine], months[1:]))
+    return df, results
+
+
+def main(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.chdir(args.workdir)
+    from report_portfolios.utils import month_range
+    from report_portfolios.config import DEFAULT_TRANSACTION_COST
+    from report_portfolios.price_cache import get_price_cache
+    from report_portfolios.price_source import DirectorySource
+    from report_portfolios.prices import get_price_data
+
+    timer = StageTimer()
+    months = month_range(args.first_month, args.end_month)
+    kospi = pd.read_csv(os.path.join(args.data_dir, 'kospi.csv'), parse_dates=['Date'], index_col='Date')
+    kospi_daily_returns = kospi['Close'].pct_change().dropna()
+
+    # Prices are copied in first so that the return stages below are timed on warm price data
+    codes = pd.read_csv(os.path.join('score', f'{args.package}.csv'), usecols=['code'])['code'].str.replace("'", "").unique()
+    source = DirectorySource(os.path.join(args.data_dir, 'prices'))
+    timer('get_price_data_cold', get_price_data, codes, source)
+    timer('get_price_data_warm', get_price_data, codes, source)
+
+    if args.package == 'sentiment':
+        df, results = run_sentiment(timer, months, kospi_daily_returns, args.engines, DEFAULT_TRANSACTION_COST, 0.8)
+    else:
+        df, results = run_analyst(timer, months, kospi_daily_returns, args.engines, DEFAULT_TRANSACTION_COST)
+
+    report = {'package': args.package, 'n_rows': len(df), 'stages': timer.stages,
+              'price_cache': get_price_cache().stats(), **results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the pipeline stages of one package on synthetic data.')
+    parser.add_argument('--package', required=True, choices=['sentiment', 'analyst'])
+    parser.add_argument('--workdir', required=True, help='Run directory holding score/; price_data/ is created in it')
+    parser.add_argument('--data_dir', required=True, help='Directory written by synthetic.generate')
+    parser.add_argument('--first_month', required=True)
+    parser.add_argument('--end_month', required=True)
+    parser.add_argument('--engines', nargs='+', default=['matrix', 'per_code'])
+    parser.add_argument('--output', required=True, help='JSON report path')
+    main(parser.parse_args())
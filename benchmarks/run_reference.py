@@ -0,0 +1,128 @@
+"""
+Runs the original implementation of one strategy family on a synthetic data set.
+
+The original scripts are imported from a checkout of the repository's first commit (--source),
+e.g. made from benchmarks/ with `git worktree add ../../original $(git rev-list --max-parents=0 HEAD)`, and run
+on the same prices, scores and months as run_package.py. Their metrics are what
+run.py --reference stores in the baseline, so a change shared by both engines of the package
+still shows up as a mismatch. The checkout needs the original dependencies
+(FinanceDataReader, tqdm, python-dateutil and a pandas release it runs on, such as 1.5); prices
+are read from the data set, so nothing is downloaded.
+"""
+import os
+os.environ.setdefault('TQDM_DISABLE', '1')
+import sys
+import json
+import shutil
+import argparse
+from contextlib import redirect_stdout
+import pandas as pd
+from run_package import StageTimer
+
+SENTIMENT_STRATEGIES = ['incremental_long_short', 'incremental_long_only', 'static_long_short', 'static_long_only']
+ANALYST_STRATEGIES = ['score_4_5', 'score_upwards']
+
+
+def month_list(first_month, end_month):
+    """Returns the months from first_month up to, but excluding, end_month, as the original main.py builds them."""
+    from utils import next_month
+    months, month_current = [], first_month
+    while month_current < end_month:
+        months.append(month_current)
+        month_current = next_month(month_current)
+    return months
+
+
+def load_scores(package):
+    """Loads score/{package}.csv as the original main.py does."""
+    df = pd.read_csv(f'./score/{package}.csv', index_col=0)
+    df.index = pd.to_datetime(df.index)
+    df['code'] = df['code'].str.replace("'", "")
+    return df
+
+
+def run_sentiment(timer, months, kospi_daily_returns):
+    import strategy
+    from evaluation import evaluate_portfolio
+
+    df = timer('load_scores', load_scores, 'sentiment')
+    df = df[df.index >= f'{months[0]}-01']
+    portfolios = {
+        'incremental_long_short': lambda: strategy.incremental_long_short_portfolio('sentiment', months, df),
+        'incremental_long_only': lambda: strategy.incremental_long_only_portfolio(months, df),
+        'static_long_short': lambda: strategy.static_long_short_portfolio('sentiment', months, df),
+        'static_long_only': lambda: strategy.static_long_only_portfolio(months, df),
+    }
+    metrics = {}
+    for strategy_name in SENTIMENT_STRATEGIES:
+        result = timer(f'{strategy_name}/reference', portfolios[strategy_name])
+        port_daily_returns = pd.concat(result.values()).sort_index()
+        metrics[strategy_name] = evaluate_portfolio(port_daily_returns, kospi_daily_returns, 'sentiment')
+    return df, metrics
+
+
+def signals_of_every_report(signal_function, df):
+    """
+    Runs an original signal function without letting reports that share a date overwrite each other.
+
+    The original functions store signals with signal.loc[date], so only one report per date
+    survived; the package keeps every qualifying report, as asked for when the signals were
+    vectorized. Each report gets a distinct offset of a few nanoseconds on its date for the
+    call, which leaves the rules and the order of the signals unchanged, and the dates are
+    restored afterwards.
+    """
+    df = df.copy()
+    df.index = df.index + pd.to_timedelta(range(len(df)), unit='ns')
+    signal = signal_function(df)
+    signal.index = signal.index.normalize()
+    return signal
+
+
+def run_analyst(timer, months, kospi_daily_returns, transaction_cost):
+    import strategy
+    from evaluation import evaluate_portfolio
+
+    df = timer('load_scores', load_scores, 'analyst')
+    signals = {'score_4_5': strategy.score_4_5_buy_signals, 'score_upwards': strategy.score_upwards_buy_signals}
+    metrics = {}
+    for strategy_name in ANALYST_STRATEGIES:
+        signal = timer(f'{strategy_name}/signals_reference', signals_of_every_report, signals[strategy_name], df)
+        port_daily_returns = timer(f'{strategy_name}/reference', strategy.compute_daily_returns, signal, months, transaction_cost)
+        metrics[strategy_name] = evaluate_portfolio(port_daily_returns, kospi_daily_returns, 'analyst')
+    return df, metrics
+
+
+def main(args):
+    sys.path.insert(0, os.path.join(os.path.abspath(args.source), f'{args.package}_score_portfolios'))
+    os.chdir(args.workdir)
+    from config import DATA_PATH, DEFAULT_TRANSACTION_COST
+
+    shutil.copytree(os.path.join(args.data_dir, 'prices'), DATA_PATH, dirs_exist_ok=True)
+    kospi = pd.read_csv(os.path.join(args.data_dir, 'kospi.csv'), parse_dates=['Date'], index_col='Date')
+    kospi_daily_returns = kospi['Close'].pct_change().dropna()
+
+    timer = StageTimer()
+    months = month_list(args.first_month, args.end_month)
+    # The original functions print every result and every skipped code
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        if args.package == 'sentiment':
+            df, metrics = run_sentiment(timer, months, kospi_daily_returns)
+        else:
+            df, metrics = run_analyst(timer, months, kospi_daily_returns, DEFAULT_TRANSACTION_COST)
+
+    report = {'package': args.package, 'n_rows': len(df), 'stages': timer.stages, 'engine_diff': {},
+              'metrics': {name: {metric: float(value) for metric, value in values.items()} for name, values in metrics.items()}}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the original implementation of one package on synthetic data.')
+    parser.add_argument('--package', required=True, choices=['sentiment', 'analyst'])
+    parser.add_argument('--source', required=True, help="Checkout of the original code (holding sentiment_score_portfolios/ and analyst_score_portfolios/)")
+    parser.add_argument('--workdir', required=True, help='Run directory holding score/; price_data/ is created in it')
+    parser.add_argument('--data_dir', required=True, help='Directory written by synthetic.generate')
+    parser.add_argument('--first_month', required=True)
+    parser.add_argument('--end_month', required=True)
+    parser.add_argument('--output', required=True, help='JSON report path')
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+def month_starts(first_month, end_month):
+    """Returns the first day of every month from first_month up to, but excluding, end_month."""
+    return pd.date_range(f'{first_month}-01', f'{end_month}-01', freq='MS', inclusive='left')
+
+
+def generate_prices(n_codes, first_month, end_month, seed=0):
+    """
+    Generates daily closes for n_codes codes on business days from the month before first_month.
+
+    About 3% of days are missing per code, every 10th code skips one whole month and every
+    25th code stops trading halfway, so the return calculations meet the same gaps as real data.
+
+    Returns:
+    tuple: Codes (list of 6-digit strings) and a dates x codes frame of closes (NaN where not traded).
+    """
+    rng = np.random.default_rng(seed)
+    first_day = month_starts(first_month, end_month)[0] - pd.DateOffset(months=1)
+    dates = pd.bdate_range(first_day, pd.Timestamp(f'{end_month}-01') - pd.Timedelta(days=1), name='Date')
+    codes = [f'{i:06d}' for i in range(1, n_codes + 1)]
+
+    log_returns = rng.normal(0.0003, 0.02, (len(dates), n_codes))
+    close = np.round(np.exp(np.log(rng.uniform(1000, 100000, n_codes)) + np.cumsum(log_returns, axis=0)))
+    traded = rng.random(close.shape) > 0.03
+    months = dates.to_period('M')
+    unique_months = months.unique()
+    for k in range(n_codes):
+        if k % 10 == 9:
+            traded[:, k] &= months != unique_months[rng.integers(1, len(unique_months))]
+        if k % 25 == 24:
+            traded[len(dates) // 2:, k] = False
+    close[~traded] = np.nan
+    return codes, pd.DataFrame(close, index=dates, columns=codes)
+
+
+def generate_kospi(first_month, end_month, seed=0):
+    """Generates a KOSPI-like daily close series over the same business days as generate_prices."""
+    rng = np.random.default_rng(seed + 1)
+    first_day = month_starts(first_month, end_month)[0] - pd.DateOffset(months=1)
+    dates = pd.bdate_range(first_day, pd.Timestamp(f'{end_month}-01') - pd.Timedelta(days=1), name='Date')
+    return pd.Series(2000 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, len(dates)))), index=dates, name='Close')
+
+
+def generate_reports(n_reports, codes, first_month, end_month, seed=0):
+    """
+    Generates n_reports report rows on business days of the given months, shaped like score/*.csv.
+
+    Codes are drawn with a skewed popularity so that some codes get several reports a month.
+
+    Returns:
+    pd.DataFrame: Columns dt ('YYYY.MM.DD'), name, code (with the leading quote), pos_score
+    (sentiment, in [0, 1]) and score (analyst, 1 to 5), sorted by date.
+    """
+    rng = np.random.default_rng(seed + 2)
+    days = pd.bdate_range(f'{first_month}-01', pd.Timestamp(f'{end_month}-01') - pd.Timedelta(days=1))
+    popularity = 1 / np.arange(1, len(codes) + 1) ** 0.8
+    picked = rng.choice(len(codes), n_reports, p=popularity / popularity.sum())
+    reports = pd.DataFrame({
+        'dt': days[np.sort(rng.integers(0, len(days), n_reports))].strftime('%Y.%m.%d'),
+        'name': [f'stock{i + 1}' for i in picked],
+        'code': ["'" + codes[i] for i in picked],
+        'pos_score': np.round(rng.beta(2, 2, n_reports), 3),
+        'score': rng.choice([1, 2, 3, 4, 5], n_reports, p=[0.05, 0.1, 0.25, 0.4, 0.2]),
+    })
+    return reports
+
+
+def generate(output_dir, n_reports=1000, n_codes=200, first_month='2016-01', end_month='2017-01', seed=0):
+    """
+    Writes a complete offline data set under output_dir.
+
+    - prices/{code}.csv: price history per code, to be copied in with a DirectorySource
+    - kospi.csv: benchmark closes
+    - score/sentiment.csv and score/analyst.csv: report scores in the layout of the score folders
+
+    Returns:
+    dict: The generation parameters, stored alongside benchmark results.
+    """
+    codes, close = generate_prices(n_codes, first_month, end_month, seed)
+    os.makedirs(os.path.join(output_dir, 'prices'), exist_ok=True)
+    for code in codes:
+        column = close[code].dropna()
+        price_df = pd.DataFrame({'Open': column, 'High': column, 'Low': column, 'Close': column, 'Volume': 1000})
+        price_df.to_csv(os.path.join(output_dir, 'prices', f'{code}.csv'))
+
+    generate_kospi(first_month, end_month, seed).to_frame().to_csv(os.path.join(output_dir, 'kospi.csv'))
+
+    reports = generate_reports(n_reports, codes, first_month, end_month, seed)
+    os.makedirs(os.path.join(output_dir, 'score'), exist_ok=True)
+    reports[['dt', 'name', 'code', 'pos_score']].to_csv(os.path.join(output_dir, 'score', 'sentiment.csv'),
+                                                         index=False, encoding='utf-8-sig')
+    reports[['dt', 'name', 'code', 'score']].to_csv(os.path.join(output_dir, 'score', 'analyst.csv'),
+                                                     index=False, encoding='utf-8-sig')
+
+    return {'n_reports': n_reports, 'n_codes': n_codes, 'first_month': first_month, 'end_month': end_month, 'seed': seed}
@@ -0,0 +1,8 @@
+"""
+Backtests of portfolios built from analyst report scores.
+
+The shared modules (prices, return engine, evaluation) live at the top level and the two
+strategy families in the analyst and sentiment subpackages. Heavy dependencies are imported
+where they are used: pandas not before the command line is parsed, FinanceDataReader only
+when prices are downloaded and tqdm only when a progress bar is drawn.
+"""
@@ -0,0 +1,3 @@
+"""Portfolios built from analyst opinion scores (1 = sell to 5 = strong buy)."""
+
+STRATEGIES = ['score_4_5', 'score_upwards']
@@ -0,0 +1,87 @@
+import argparse
+import logging
+from . import STRATEGIES
+from ..config import DEFAULT_START_DATE, DEFAULT_TRANSACTION_COST, FIRST_MONTH, LIVE_STATE_PATH
+from ..live_state import state_file, load_state, save_state
+from ..utils import month_range, next_month
+from .main import load_dataset
+
+logging.basicConfig(level=logging.INFO)
+
+
+def update_backtest(dataset_name, strategy_name, df, transaction_cost=DEFAULT_TRANSACTION_COST,
+                    state_dir=LIVE_STATE_PATH, source=None, refresh_prices=True):
+    """
+    Extends the persisted backtest of a strategy with new reports and new prices.
+
+    The state keeps each month's holdings and daily returns and the last price date seen.
+    Signals are regenerated in one vectorized pass, and returns are recomputed only for new
+    months, months whose holdings changed, months from the last price date onwards and months
+    holding a code whose history was restated.
+
+    Args:
+    dataset_name (str): Name of the score dataset.
+    strategy_name (str): One of STRATEGIES.
+    df (pd.DataFrame): Date-indexed reports, including the new rows.
+    transaction_cost (float): See compute_daily_returns; changing it starts a new backtest.
+    state_dir (str): Directory of the persisted states.
+    source (PriceSource): Price provider for get_price_data.
+    refresh_prices (bool): Append the latest prices of stored codes before updating.
+
+    Returns:
+    tuple: Daily portfolio returns of the whole backtest (pd.Series) and the recomputed months.
+    """
+    import pandas as pd
+    from ..price_panel import open_price_panel
+    from ..return_engine import portfolio_returns, selection_weights
+    from .strategy import get_price_data, generate_buy_signals, signal_holdings
+    path = state_file(dataset_name, strategy_name, state_dir)
+    params = {'dataset_name': dataset_name, 'strategy_name': strategy_name, 'transaction_cost': transaction_cost}
+    state = load_state(path)
+    if state is None or state['params'] != params:
+        state = {'params': params, 'price_end': None, 'last_month': None, 'holdings': {}, 'returns': {}}
+
+    summary = get_price_data(list(set(df['code'])), source, refresh_prices)
+    price_end = open_price_panel().dates[-1]
+    months = month_range(FIRST_MONTH, next_month(price_end.strftime('%Y-%m')))[1:]
+    holdings = signal_holdings(generate_buy_signals(strategy_name, df), months)
+
+    first_price_month = state['price_end'][:7] if state['price_end'] else FIRST_MONTH
+    restated = set(summary['restated'])
+    recompute = [month for month in months
+                 if month not in state['returns'] or set(holdings[month]) != set(state['holdings'].get(month, []))
+                 or month >= first_price_month or set(holdings[month]) & restated]
+
+    if recompute:
+        state['returns'].update(portfolio_returns(recompute, selection_weights(holdings, recompute),
+                                                  long_cost=2 * transaction_cost))
+
+    state['holdings'] = holdings
+    state['price_end'] = price_end.strftime('%Y-%m-%d')
+    state['last_month'] = months[-1]
+    save_state(state, path)
+
+    port_daily_returns = pd.concat([state['returns'][month] for month in months])
+    return port_daily_returns, recompute
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Extend a persisted backtest with new scores and prices.')
+    parser.add_argument('--dataset_name', required=True, help='Name of the dataset (excluding .csv)')
+    parser.add_argument('--strategy_name', required=True, choices=STRATEGIES, help='strategy to use')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='Transaction cost to be considered')
+    parser.add_argument('--state_dir', default=LIVE_STATE_PATH, help='Directory of the persisted backtest states')
+    parser.add_argument('--no_refresh', action='store_true', help='Do not fetch the latest prices of stored codes')
+
+    args = parser.parse_args(argv)
+    from ..evaluation import fetch_kospi_data, evaluate_portfolio
+    df = load_dataset(args.dataset_name)
+    port_daily_returns, recomputed = update_backtest(args.dataset_name, args.strategy_name, df, args.transaction_cost,
+                                                     args.state_dir, refresh_prices=not args.no_refresh)
+    logging.info(f"Recomputed {len(recomputed)} months: {', '.join(recomputed)}")
+    kospi_daily_returns = fetch_kospi_data(DEFAULT_START_DATE, port_daily_returns.index[-1].strftime('%Y-%m-%d'))
+    evaluate_portfolio(port_daily_returns, kospi_daily_returns, args.dataset_name)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,116 @@
+import argparse
+from . import STRATEGIES
+from ..config import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_TRANSACTION_COST, DATA_PATH, PRICE_CACHE_MAX_BYTES, FIRST_MONTH, END_MONTH, CHECKPOINT_PATH
+from ..profiling import start_profiling, stage
+
+
+def load_dataset(dataset_name):
+    """Loads ./score/{dataset_name}.csv as a date-indexed frame with the quote stripped from 'code'."""
+    from ..score_store import load_scores
+    return load_scores(f'./score/{dataset_name}.csv')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate stock portfolio strategies')
+    parser.add_argument('--dataset_name', type=str, required=True, help='Path to the dataset')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='Transaction cost for trades')
+    parser.add_argument('--cost_model', type=str, default='flat', choices=['flat', 'turnover'], help='Charge costs on every position every month (flat) or per unit of weight traded (turnover)')
+    parser.add_argument('--ledger', type=str, default=None, help='Write the monthly names, turnover, exposures and cost drag of the holdings to this CSV')
+    parser.add_argument('--strategy_name', type=str, required=True, choices=STRATEGIES, help='Name of the strategy to use')
+    parser.add_argument('--price_cache_mb', type=int, default=PRICE_CACHE_MAX_BYTES // 1024 ** 2, help='Memory budget of the in-process price cache in MB')
+    parser.add_argument('--engine', type=str, default='matrix', choices=['matrix', 'per_code'], help='Compute returns for all months at once (matrix) or code by code (per_code)')
+    parser.add_argument('--price_source_dir', type=str, default=None, help='Copy missing prices from {code}.csv files in this directory instead of downloading them')
+    parser.add_argument('--refresh_prices', action='store_true', help='Append the latest prices to codes that are already stored')
+    parser.add_argument('--stream', action='store_true', help='Compute and evaluate the returns month by month instead of holding every month in memory')
+    parser.add_argument('--save_returns', type=str, default=None, help='Write the daily portfolio returns to this CSV (input of significance.py)')
+    parser.add_argument('--random_portfolios', type=int, default=0, help='Compare the strategy with this many portfolios of randomly drawn codes')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random portfolios')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for the random portfolios (default: number of CPUs)')
+    parser.add_argument('--month_workers', type=int, default=1, help='Processes computing months in parallel (0: number of CPUs)')
+    parser.add_argument('--checkpoint', nargs='?', const=CHECKPOINT_PATH, default=None,
+                        help=f'Store completed months in this directory and resume from them on the next identical run (default: {CHECKPOINT_PATH})')
+    parser.add_argument('--profile', nargs='?', const='./profile.json', default=None, help='Write per-stage wall times and counters to this JSON file (default: ./profile.json)')
+    args = parser.parse_args(argv)
+    if args.stream and args.save_returns:
+        parser.error("--save_returns needs every month's returns; drop --stream")
+
+    from ..utils import month_range
+    from ..evaluation import evaluate_portfolio, evaluate_portfolio_stream, fetch_kospi_data
+    from ..price_cache import get_price_cache
+    from ..price_source import DirectorySource
+    from .strategy import get_price_data, generate_buy_signals, compute_daily_returns, iter_monthly_returns, signal_holdings
+    from ..significance import random_portfolio_test, write_daily_returns
+    from ..position_ledger import PositionLedger
+    from ..checkpoint import Checkpoint, score_fingerprint, price_version
+
+    profiler = start_profiling() if args.profile else None
+
+
+    # Load the dataset
+    with stage('load_scores'):
+        df = load_dataset(args.dataset_name)
+    # Extract stock codes
+    codes = list(set(df['code']))
+    
+    print("Fetching price data for the stock codes...")
+    # Fetch price data
+    with stage('fetch_prices'):
+        get_price_data(codes, DirectorySource(args.price_source_dir) if args.price_source_dir else None, args.refresh_prices)
+
+    # Generate buy signals based on the selected strategy
+    with stage('build_signals'):
+        signal = generate_buy_signals(args.strategy_name, df)
+
+    # Define the months range
+    months = month_range(FIRST_MONTH, END_MONTH)
+
+    price_cache = get_price_cache(DATA_PATH, args.price_cache_mb * 1024 ** 2)
+    checkpoint = None
+    if args.checkpoint:
+        params = dict(package='analyst', dataset=args.dataset_name, strategy=args.strategy_name,
+                      transaction_cost=args.transaction_cost, cost_model=args.cost_model, engine=args.engine)
+        checkpoint = Checkpoint(score_fingerprint(df), params, price_version(), args.checkpoint)
+    if args.stream:
+        with stage('evaluation'):
+            kospi_daily_returns = fetch_kospi_data(DEFAULT_START_DATE, DEFAULT_END_DATE)
+        # Each month's returns are evaluated as soon as they are computed and then dropped
+        with stage('returns'):
+            monthly_returns = iter_monthly_returns(signal, months, args.transaction_cost, args.engine, cost_model=args.cost_model, checkpoint=checkpoint,
+                                                   workers=args.month_workers or None)
+            evaluation_results = evaluate_portfolio_stream((returns for _, returns in monthly_returns), kospi_daily_returns, args.dataset_name)
+        print(f"Price cache: {price_cache.stats()}")
+    else:
+        with stage('returns'):
+            port_daily_returns = compute_daily_returns(signal, months, args.transaction_cost, args.engine, args.cost_model, checkpoint, args.month_workers or None)
+        print(f"Price cache: {price_cache.stats()}")
+
+        with stage('evaluation'):
+            # Fetch KOSPI data
+            kospi_daily_returns = fetch_kospi_data(DEFAULT_START_DATE, DEFAULT_END_DATE)
+
+            # Evaluate the portfolio
+            evaluation_results = evaluate_portfolio(port_daily_returns, kospi_daily_returns, args.dataset_name)
+        if args.save_returns:
+            write_daily_returns(port_daily_returns, args.save_returns)
+    print(evaluation_results)
+
+    if args.ledger:
+        ledger = PositionLedger.from_selections(months[1:], signal_holdings(signal, months[1:]))
+        ledger.summary(args.transaction_cost).to_csv(args.ledger)
+
+    if args.random_portfolios:
+        with stage('random_portfolios'):
+            table = random_portfolio_test({'annualized_return': evaluation_results['port_annualized_return'],
+                                           'sharpe_ratio': evaluation_results['sharpe_ratio_port']},
+                                          months[1:], signal_holdings(signal, months[1:]), universe=codes,
+                                          long_cost=2 * args.transaction_cost,
+                                          n_replications=args.random_portfolios, seed=args.seed, max_workers=args.workers)
+        print(f"\n{args.dataset_name} against {args.random_portfolios} random portfolios")
+        print(table.to_string())
+
+    if profiler is not None:
+        profiler.extra['price_cache'] = price_cache.stats()
+        profiler.write(args.profile)
+
+if __name__ == "__main__":
+    main()
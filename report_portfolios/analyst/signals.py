@@ -0,0 +1,67 @@
+import pandas as pd
+
+SIGNAL_COLUMNS = ['name', 'code', 'target_price', 'score']
+
+
+def score_in(values):
+    """Rule: the report's score is one of values."""
+    values = list(values)
+    return lambda score, prev_score: score.isin(values)
+
+
+def score_not_below_previous():
+    """Rule: the score is at least the score of the previous report on the same code."""
+    return lambda score, prev_score: score >= prev_score
+
+
+def score_crossed_above(threshold):
+    """Rule: the score is above threshold while the previous report's score was not."""
+    return lambda score, prev_score: (score > threshold) & (prev_score <= threshold)
+
+
+def score_rose_by(n):
+    """Rule: the score rose by at least n from the previous report on the same code."""
+    return lambda score, prev_score: (score - prev_score) >= n
+
+
+def all_of(*rules):
+    """Rule: every one of rules holds."""
+    def rule(score, prev_score):
+        mask = pd.Series(True, index=score.index)
+        for r in rules:
+            mask &= r(score, prev_score)
+        return mask
+    return rule
+
+
+def any_of(*rules):
+    """Rule: at least one of rules holds."""
+    def rule(score, prev_score):
+        mask = pd.Series(False, index=score.index)
+        for r in rules:
+            mask |= r(score, prev_score)
+        return mask
+    return rule
+
+
+def generate_signals(df, rule):
+    """
+    Generates buy signals for every report that satisfies a rule.
+
+    A rule is a callable taking the report scores and the previous report's score on the same
+    code (NaN for a code's first report) and returning a boolean mask. Comparisons against
+    NaN are False, so rules that look back never fire on a code's first report. Every
+    qualifying report is kept, including several reports sharing one date.
+
+    Args:
+    df (pd.DataFrame): Date-indexed reports with 'code' and 'score' columns, in report order.
+    rule (callable): One of the rules above, or any callable with the same signature.
+
+    Returns:
+    pd.DataFrame: Date-sorted signals with SIGNAL_COLUMNS.
+    """
+    score = df['score'].reset_index(drop=True)
+    prev_score = score.groupby(df['code'].to_numpy(), sort=False).shift(1)
+    mask = rule(score, prev_score).fillna(False).to_numpy(dtype=bool)
+    signal = df[mask].reindex(columns=SIGNAL_COLUMNS)
+    return signal.sort_index(kind='stable')
@@ -0,0 +1,159 @@
+import pandas as pd
+from ..utils import prev_month
+from ..prices import get_price_data
+from ..price_cache import get_price_cache
+from ..return_engine import code_month_returns, portfolio_returns, selection_weights
+from ..position_ledger import PositionLedger, charge_cost_drag
+from ..month_scheduler import month_chunks, run_month_tasks
+from ..trading_calendar import trading_calendar
+from ..profiling import count, stage
+from .signals import generate_signals, score_in, score_not_below_previous
+
+
+def score_4_5_buy_signals(df):
+    """
+    Generates buy signals for stocks where the score is either 4 or 5.
+    
+    Args:
+    df (pd.DataFrame): DataFrame containing stock data with 'score' column.
+
+    Returns:
+    pd.DataFrame: DataFrame with buy signals.
+    """
+    return generate_signals(df, score_in([4, 5]))
+
+
+def score_upwards_buy_signals(df):
+    """
+    Generates buy signals for stocks where the score has increased from the previous report.
+    
+    Args:
+    df (pd.DataFrame): DataFrame containing stock data with 'score' column.
+
+    Returns:
+    pd.DataFrame: DataFrame with buy signals.
+    """
+    return generate_signals(df, score_not_below_previous())
+
+
+def generate_buy_signals(strategy_name, df):
+    """Generates the buy signals of one of STRATEGIES."""
+    if strategy_name == 'score_4_5':
+        return score_4_5_buy_signals(df)
+    elif strategy_name == 'score_upwards':
+        return score_upwards_buy_signals(df)
+    raise ValueError(f"Strategy {strategy_name} is not recognized.")
+
+
+def signal_holdings(signal, months):
+    """Returns, for each holding month, the set of codes signalled during the previous month."""
+    signal_codes = signal['code'].groupby(signal.index.strftime('%Y-%m')).agg(set)
+    return {month: signal_codes.get(prev_month(month), set()) for month in months}
+
+
+def compute_daily_returns(signal, months, transaction_cost, engine='matrix', cost_model='flat', checkpoint=None, workers=1):
+    """
+    Computes the daily returns of holding, during each month, the codes signalled in the previous month.
+
+    Args:
+    signal (pd.DataFrame): Date-indexed buy signals with a 'code' column.
+    months (list): Months ('YYYY-MM'); the first one only provides signals.
+    transaction_cost (float): One-way transaction cost; twice this is charged on entry.
+    engine (str): 'matrix' computes every month in one pass with return_engine;
+        'per_code' reads each code's prices month by month.
+    cost_model (str): 'flat' charges twice transaction_cost on every position every month;
+        'turnover' charges transaction_cost per unit of weight traded (see position_ledger).
+    checkpoint (Checkpoint): Store completed months here and only compute the months it lacks.
+    workers (int): Processes computing months in parallel (None: number of CPUs; 1 computes them in this process).
+
+    Returns:
+    pd.Series: Daily portfolio returns.
+    """
+    port_monthly_returns = dict(iter_monthly_returns(signal, months, transaction_cost, engine, chunk_months=None, cost_model=cost_model,
+                                                     checkpoint=checkpoint, workers=workers))
+    return pd.concat(port_monthly_returns.values(), axis=0)
+
+
+def iter_monthly_returns(signal, months, transaction_cost, engine='matrix', chunk_months=12, cost_model='flat', checkpoint=None, workers=1):
+    """
+    Yields (month, portfolio daily returns) for each holding month, as compute_daily_returns computes them.
+
+    Only the months being computed are held in memory: the matrix engine runs chunk_months
+    months per pass and the per_code engine one month at a time.
+
+    Args:
+    signal (pd.DataFrame): Date-indexed buy signals with a 'code' column.
+    months (list): Months ('YYYY-MM'); the first one only provides signals.
+    transaction_cost (float): One-way transaction cost; twice this is charged on entry.
+    engine (str): 'matrix' or 'per_code', see compute_daily_returns.
+    chunk_months (int): Months per pass of the matrix engine; None computes all months in one pass.
+    cost_model (str): 'flat' or 'turnover', see compute_daily_returns.
+    checkpoint (Checkpoint): Store completed months here and only compute the months it lacks.
+    workers (int): Processes computing months in parallel, see compute_daily_returns.
+
+    Yields:
+    tuple: Month and its pd.Series of portfolio daily returns.
+    """
+    holding_months = months[1:]
+    if cost_model == 'turnover':
+        # Returns are computed without costs; each month's rebalancing cost comes off its first day
+        ledger = PositionLedger.from_selections(holding_months, signal_holdings(signal, holding_months))
+        yield from charge_cost_drag(iter_monthly_returns(signal, months, 0.0, engine, chunk_months, checkpoint=checkpoint, workers=workers),
+                                    ledger, transaction_cost)
+        return
+    if cost_model != 'flat':
+        raise ValueError(f"Cost model {cost_model} is not recognized.")
+    if checkpoint is not None:
+        # Each holding month only needs the previous month's signals, so the missing months are
+        # computed on their own (in chunks, so a run that dies keeps its finished chunks)
+        yield from checkpoint.resume(holding_months, lambda missing: iter_monthly_returns(signal, [prev_month(missing[0])] + missing, transaction_cost,
+                                                                                          engine, chunk_months or 12, workers=workers))
+        return
+    if workers != 1 and len(holding_months) > 1:
+        # Each worker gets a chunk's months and the signals of the months before them; returns are
+        # merged in month order, so the result is the serial one
+        chunk_months = (chunk_months or 12) if engine == 'matrix' else 1
+        signal_months = signal.index.strftime('%Y-%m')
+        tasks = []
+        for chunk in month_chunks(holding_months, chunk_months):
+            chunk_signal = signal[signal_months.isin([prev_month(month) for month in chunk])]
+            tasks.append((iter_monthly_returns, (chunk_signal, [prev_month(chunk[0])] + chunk, transaction_cost, engine, chunk_months)))
+        yield from run_month_tasks(tasks, workers)
+        return
+    if engine == 'matrix':
+        holdings = signal_holdings(signal, holding_months)
+        chunk_months = chunk_months or max(len(holding_months), 1)
+        for i in range(0, len(holding_months), chunk_months):
+            chunk = holding_months[i:i + chunk_months]
+            yield from portfolio_returns(chunk, selection_weights(holdings, chunk), long_cost=2 * transaction_cost).items()
+        return
+
+    price_cache = get_price_cache()
+    calendar = trading_calendar()
+
+    for month in holding_months:
+        with stage('month_returns', month=month):
+            port_daily_returns = {}
+            st = prev_month(month)
+            target_signal = signal.loc[st]
+            # # Skip if no data for that month
+            # if st not in signal.index:
+            #     continue
+
+            port_codes = list(set(target_signal['code']))
+
+            for code in port_codes:
+                try:
+                    daily_pct_return = code_month_returns(price_cache.get_close(code), calendar, month, 2 * transaction_cost)
+                    if daily_pct_return is None:
+                        print(f"Month {month} data is not available for code {code}")
+                        count('skipped_codes', month=month, code=code)
+                        continue
+                    port_daily_returns[code] = daily_pct_return
+
+                except Exception as e:
+                    print(f"Error processing code {code} for month {month}: {e}")
+                    count('exceptions', month=month, code=code)
+
+            port_daily_returns = pd.DataFrame(port_daily_returns)
+        yield month, port_daily_returns.mean(axis=1)
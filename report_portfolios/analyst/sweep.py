@@ -0,0 +1,32 @@
+from . import STRATEGIES
+from .. import sweep_results
+
+PACKAGE = 'analyst'
+
+
+def portfolio_returns(params, df, months, checkpoint=None):
+    """Runs one (dataset, strategy, transaction_cost) combination and returns its daily portfolio returns."""
+    from .strategy import generate_buy_signals, compute_daily_returns
+    signal = generate_buy_signals(params['strategy'], df)
+    return compute_daily_returns(signal, months, params['transaction_cost'], checkpoint=checkpoint)
+
+
+def sweep(datasets, strategies, transaction_costs, max_workers=None, output_path='../sweep_results.csv',
+          checkpoint_path=None):
+    """Evaluates every combination of the grid on a process pool, see sweep_results.sweep."""
+    from .main import load_dataset
+    scores = {dataset_name: load_dataset(dataset_name) for dataset_name in datasets}
+    # The analyst strategies have no quantile cutoff; the column is kept so both packages share one table
+    return sweep_results.sweep(PACKAGE, portfolio_returns, scores, strategies, transaction_costs, [float('nan')],
+                               max_workers, output_path, checkpoint_path)
+
+
+def cli(argv=None):
+    parser = sweep_results.build_sweep_parser('Evaluate every combination of datasets, strategies and transaction costs.',
+                                              ['analyst'], STRATEGIES, quantiles=False)
+    args = parser.parse_args(argv)
+    print(sweep(args.datasets, args.strategies, args.transaction_costs, args.workers, args.output, args.checkpoint).to_string(index=False))
+
+
+if __name__ == "__main__":
+    cli()
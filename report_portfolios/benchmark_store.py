@@ -0,0 +1,191 @@
+import os
+import json
+import argparse
+import logging
+import pandas as pd
+from .config import DATA_PATH, BENCHMARK_DIR, BENCHMARK_MANIFEST, BENCHMARK_SYMBOLS, DEFAULT_START_DATE, DEFAULT_END_DATE
+from .price_source import FinanceDataReaderSource, fetch_with_retry
+from .profiling import count
+
+_stores = {}
+
+
+def _merge_ranges(ranges):
+    """Merges [start, end] date ranges ('YYYY-MM-DD') that overlap or touch into sorted disjoint ones."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and pd.Timestamp(start) <= pd.Timestamp(merged[-1][1]) + pd.Timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _missing_ranges(covered, start, end):
+    """Returns the parts of [start, end] that no covered range holds."""
+    missing, cursor = [], pd.Timestamp(start)
+    for covered_start, covered_end in covered:
+        covered_start, covered_end = pd.Timestamp(covered_start), pd.Timestamp(covered_end)
+        if covered_end < cursor:
+            continue
+        if covered_start > pd.Timestamp(end):
+            break
+        if covered_start > cursor:
+            missing.append([cursor, covered_start - pd.Timedelta(days=1)])
+        cursor = covered_end + pd.Timedelta(days=1)
+    if cursor <= pd.Timestamp(end):
+        missing.append([cursor, pd.Timestamp(end)])
+    return [[s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')] for s, e in missing]
+
+
+class BenchmarkStore:
+    """
+    Daily closes of benchmark indices kept in {file_path}/{BENCHMARK_DIR}/{name}.csv.
+
+    The manifest records, per index, the date ranges that were already requested (including
+    days without trading), so a request only fetches the parts of its range the store does not
+    hold and a fully covered request never touches the network. Ranges are recorded only up to
+    yesterday, since today's close may still change.
+    """
+
+    def __init__(self, file_path=DATA_PATH, source=None):
+        self.path = os.path.join(file_path, BENCHMARK_DIR)
+        self.source = FinanceDataReaderSource() if source is None else source
+        self._closes = {}
+
+    def _manifest(self):
+        path = os.path.join(self.path, BENCHMARK_MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.path, BENCHMARK_MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def _read(self, name):
+        if name not in self._closes:
+            path = os.path.join(self.path, f'{name}.csv')
+            if os.path.exists(path):
+                self._closes[name] = pd.read_csv(path, parse_dates=['Date'], index_col='Date', float_precision='round_trip')['Close']
+            else:
+                self._closes[name] = pd.Series(dtype='float64', index=pd.DatetimeIndex([], name='Date'), name='Close')
+        return self._closes[name]
+
+    def covered(self, name):
+        """Returns the date ranges held for an index."""
+        return self._manifest().get(name, [])
+
+    def closes(self, name, start_date, end_date=None):
+        """
+        Returns an index's daily closes from start_date through end_date, fetching the missing ranges first.
+
+        Args:
+        name (str): One of BENCHMARK_SYMBOLS.
+        start_date (str): First date ('YYYY-MM-DD').
+        end_date (str): Last date; None means today.
+
+        Returns:
+        pd.Series: Date-indexed closes named 'Close'.
+        """
+        if name not in BENCHMARK_SYMBOLS:
+            raise ValueError(f"Benchmark {name} is not recognized.")
+        today = pd.Timestamp.today().normalize()
+        end = today if end_date is None else min(pd.Timestamp(end_date), today)
+        start = pd.Timestamp(start_date)
+        manifest = self._manifest()
+        missing = _missing_ranges(manifest.get(name, []), start, end) if start <= end else []
+        if missing:
+            self._fetch(name, missing, manifest, today)
+        else:
+            count('benchmark_hits')
+        stored = self._read(name)
+        return stored[(stored.index >= start) & (stored.index <= end)]
+
+    def _fetch(self, name, missing, manifest, today):
+        fetched, done = [], []
+        for start, end in missing:
+            logging.info(f"Fetching {name} closes from {start} to {end}")
+            try:
+                price_df = fetch_with_retry(self.source, BENCHMARK_SYMBOLS[name], start, require_rows=False, end=end)
+            except Exception as e:
+                # Offline runs go on with the stored closes; the range stays missing for the next run
+                logging.warning(f"Could not fetch {name} closes from {start} to {end}, using the stored ones: {e}")
+                count('benchmark_failures')
+                continue
+            count('benchmark_fetches')
+            done.append([start, end])
+            if price_df is not None and len(price_df):
+                price_df.index = pd.to_datetime(price_df.index)
+                fetched.append(price_df['Close'].astype('float64'))
+        if not done:
+            return
+        closes = pd.concat([self._read(name)] + fetched)
+        closes = closes[~closes.index.duplicated(keep='last')].sort_index()
+        closes.index.name, closes.name = 'Date', 'Close'
+
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, f'{name}.csv')
+        closes.to_frame().to_csv(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self._closes[name] = closes
+        # Today's close is fetched but left out of the ranges, so the next run asks for it again
+        yesterday = (today - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        done = [[start, min(end, yesterday)] for start, end in done if start <= yesterday]
+        manifest[name] = _merge_ranges(manifest.get(name, []) + done)
+        self._write_manifest(manifest)
+
+    def daily_returns(self, names, start_date, end_date=None, dates=None):
+        """
+        Returns the daily returns of several indices, as fetch_kospi_data computes them for KOSPI.
+
+        Args:
+        names (list): Indices (BENCHMARK_SYMBOLS keys).
+        start_date (str): First date; the first return is on the second trading day.
+        end_date (str): Last date; None means today.
+        dates (DatetimeIndex): If given, each index's return over the days from the previous
+            date to each date (from its last close on or before them), e.g. a portfolio's dates;
+            the first date has no return.
+
+        Returns:
+        pd.DataFrame: Dates x indices daily returns.
+        """
+        closes = pd.concat({name: self.closes(name, start_date, end_date) for name in names}, axis=1)
+        if dates is None:
+            # Each index keeps its own trading days, as when it is fetched alone
+            return pd.concat({name: closes[name].dropna().pct_change().dropna() for name in names}, axis=1)
+        aligned = closes.ffill().reindex(pd.DatetimeIndex(dates), method='ffill')
+        return aligned.pct_change(fill_method=None)
+
+
+def get_benchmark_store(file_path=DATA_PATH, source=None):
+    """Returns the process-wide benchmark store of a price directory."""
+    key = os.path.abspath(file_path)
+    if key not in _stores or source is not None:
+        _stores[key] = BenchmarkStore(file_path, source)
+    return _stores[key]
+
+
+def fetch_benchmark_data(names, start_date, end_date=None, dates=None):
+    """Returns the daily returns of several benchmark indices from the local store (see BenchmarkStore.daily_returns)."""
+    return get_benchmark_store().daily_returns(names, start_date, end_date, dates)
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Fill the local benchmark store so that later runs work offline.')
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARK_SYMBOLS), choices=list(BENCHMARK_SYMBOLS), help='Indices to store')
+    parser.add_argument('--start_date', default=DEFAULT_START_DATE, help='First date to hold')
+    parser.add_argument('--end_date', default=DEFAULT_END_DATE, help='Last date to hold')
+    args = parser.parse_args(argv)
+
+    store = get_benchmark_store()
+    for name in args.benchmarks:
+        closes = store.closes(name, args.start_date, args.end_date)
+        print(f"{name}: {len(closes)} closes, holding {store.covered(name)}")
+
+
+if __name__ == "__main__":
+    cli()
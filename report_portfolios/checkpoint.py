@@ -0,0 +1,122 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+import pandas as pd
+from .config import CHECKPOINT_PATH, DATA_PATH
+from .price_panel import _panel_files
+from .profiling import count
+
+# Bump when stored returns or result rows change meaning so older checkpoints are not reused
+CHECKPOINT_VERSION = 1
+
+
+def score_fingerprint(df):
+    """Returns a hash of a score frame's dates, columns and values."""
+    digest = hashlib.sha1(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def price_version(file_path=DATA_PATH):
+    """
+    Returns a version of the price data: the size and modification time of the price panel files.
+
+    get_price_data rebuilds the panel whenever a price CSV is added or changes, so a new
+    version means the prices behind a run may have changed.
+    """
+    stats = []
+    for name, path in sorted(_panel_files(file_path).items()):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stats.append(f'{name}:{stat.st_size}:{stat.st_mtime_ns}')
+    return hashlib.sha1('\n'.join(stats).encode()).hexdigest()
+
+
+class Checkpoint:
+    """
+    On-disk store of a run's completed months and final result.
+
+    A run is identified by its score fingerprint, strategy parameters and price version, so a
+    checkpoint is only reused by a run that would compute exactly the same returns. Each month
+    and the result are written to their own file and swapped in whole, so a run that dies
+    keeps every month it finished.
+    """
+
+    def __init__(self, scores, params, prices, path=CHECKPOINT_PATH):
+        key = json.dumps({'version': CHECKPOINT_VERSION, 'scores': scores, 'params': params, 'prices': prices},
+                         sort_keys=True, default=str)
+        self.key = hashlib.sha1(key.encode()).hexdigest()
+        self.path = os.path.join(path, self.key)
+        self.params = params
+
+    def _write(self, file_name, value):
+        os.makedirs(self.path, exist_ok=True)
+        params_path = os.path.join(self.path, 'params.json')
+        if not os.path.exists(params_path):
+            with open(params_path, 'w') as f:
+                json.dump(self.params, f, indent=1, sort_keys=True, default=str)
+        path = os.path.join(self.path, file_name)
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(value, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logging.warning(f"Could not write checkpoint {path}: {e}")
+
+    def _read(self, file_name):
+        path = os.path.join(self.path, file_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def load_month(self, month):
+        """Returns a month's stored daily returns, or None if the month was not completed."""
+        return self._read(f'{month}.pkl')
+
+    def save_month(self, month, returns):
+        self._write(f'{month}.pkl', returns)
+
+    def load_result(self):
+        """Returns the stored result of the finished run, or None."""
+        return self._read('result.pkl')
+
+    def save_result(self, result):
+        self._write('result.pkl', result)
+
+    def resume(self, months, compute):
+        """
+        Yields (month, daily returns) for every month, computing only the months not stored yet.
+
+        Args:
+        months (list): Months in order.
+        compute (callable): Takes the list of missing months and yields (month, returns) for them in order.
+
+        Yields:
+        tuple: Month and its daily returns; newly computed months are stored as they arrive.
+        """
+        stored = {}
+        for month in months:
+            returns = self.load_month(month)
+            if returns is not None:
+                stored[month] = returns
+        missing = [month for month in months if month not in stored]
+        count('checkpoint_months_loaded', len(stored))
+        count('checkpoint_months_computed', len(missing))
+        if stored:
+            logging.info(f"Resuming from checkpoint {self.key[:12]}: {len(stored)} months stored, {len(missing)} to compute")
+
+        computed = iter(compute(missing)) if missing else iter(())
+        for month in months:
+            if month in stored:
+                yield month, stored.pop(month)
+                continue
+            computed_month, returns = next(computed)
+            self.save_month(computed_month, returns)
+            yield computed_month, returns
@@ -0,0 +1,21 @@
+DEFAULT_START_DATE = '2016-01-29'
+DEFAULT_END_DATE = '2023-03-01'
+DEFAULT_TRANSACTION_COST = 0.0005
+DATA_PATH = './price_data'
+PANEL_DIR = 'panel'
+SCORE_CACHE_DIR = 'cache'
+PRICE_CACHE_MAX_BYTES = 256 * 1024 ** 2
+DOWNLOAD_MAX_WORKERS = 8
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_BACKOFF = 1.0
+PRICE_MANIFEST = 'manifest.json'
+REFRESH_OVERLAP_DAYS = 10
+FIRST_MONTH = '2016-01'
+END_MONTH = '2023-03'
+LIVE_STATE_PATH = './live_state'
+BENCHMARK_DIR = 'benchmarks'
+BENCHMARK_MANIFEST = 'manifest.json'
+BENCHMARK_SYMBOLS = {'KOSPI': 'KS11', 'KOSDAQ': 'KQ11', 'KOSPI200': 'KS200'}
+CHECKPOINT_PATH = './checkpoints'
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
@@ -0,0 +1,4 @@
+"""Portfolios built from several score sources at once (sentiment models and analyst ratings)."""
+
+STRATEGIES = ['rank_average_long_short', 'rank_average_long_only', 'zscore_long_short', 'zscore_long_only',
+              'agreement_long_short', 'agreement_long_only']
@@ -0,0 +1,82 @@
+import argparse
+import logging
+from . import STRATEGIES
+from ..config import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_TRANSACTION_COST, FIRST_MONTH, END_MONTH
+
+logging.basicConfig(level=logging.INFO)
+
+
+def load_sources(specs):
+    """Loads NAME=PATH score files into a dict of source name -> date-indexed scores."""
+    from ..score_store import load_scores
+    frames = {}
+    for spec in specs:
+        name, _, path = spec.partition('=')
+        if not path:
+            raise ValueError(f"Expected NAME=PATH, got {spec}")
+        frames[name] = load_scores(path)
+    return frames
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate ensemble strategies over several score sources in one pass.')
+    parser.add_argument('--sources', nargs='+', required=True, metavar='NAME=PATH',
+                        help='Score CSVs, e.g. gpt=score/gpt.csv analyst=../analyst_score_portfolios/score/analyst.csv')
+    parser.add_argument('--changes', nargs='*', default=[], metavar='NAME', help='Sources to use as month-over-month score changes (e.g. analyst rating upgrades)')
+    parser.add_argument('--strategies', nargs='+', default=STRATEGIES, choices=STRATEGIES, help='Strategies to run')
+    parser.add_argument('--quantile', type=float, default=0.8, help='Buy scores at or above this quantile (long-short strategies short those at or below 1 - quantile)')
+    parser.add_argument('--min_sources', type=int, default=1, help='Sources that must score a code for the rank and z-score blends to use it')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='Transaction cost to be considered')
+    parser.add_argument('--cost_model', default='flat', choices=['flat', 'turnover'], help='Charge costs on every position every month (flat) or per unit of weight traded (turnover)')
+    parser.add_argument('--engine', default='matrix', choices=['matrix', 'per_code'], help='Compute returns for all months at once (matrix) or code by code (per_code)')
+    parser.add_argument('--no_kospi', action='store_true', help='Leave the KOSPI row out (no download)')
+    parser.add_argument('--output', default=None, help='Also write the metrics table to this CSV')
+    args = parser.parse_args(argv)
+
+    try:
+        frames = load_sources(args.sources)
+    except ValueError as e:
+        parser.error(str(e))
+    unknown = [name for name in args.changes if name not in frames]
+    if unknown:
+        parser.error(f"--changes names unknown sources: {', '.join(unknown)}")
+
+    import pandas as pd
+    from ..evaluation import evaluate_portfolios
+    from ..prices import get_price_data
+    from ..score_tensor import ScoreTensor
+    from ..sentiment.strategy import monthly_portfolio_returns
+    from ..utils import month_range
+    from .strategy import select_codes
+
+    codes = set()
+    for df in frames.values():
+        codes.update(df['code'].unique())
+    get_price_data(sorted(codes))
+
+    # The last score month's codes would be held after END_MONTH, so it is left out
+    months = month_range(FIRST_MONTH, END_MONTH)
+    tensor = ScoreTensor.from_frames(frames, months[:-1]).with_changes(args.changes)
+    logging.info(f"Aligned {len(tensor.sources)} sources over {len(tensor.months)} months and {len(tensor.codes)} codes")
+
+    returns = {}
+    for strategy_name in args.strategies:
+        long_codes, short_codes = select_codes(strategy_name, tensor, args.quantile, args.min_sources)
+        monthly_returns = monthly_portfolio_returns(months[1:], long_codes, short_codes, args.engine, args.transaction_cost, args.cost_model)
+        # A month with an empty leg is zero-filled up to the next month's first day, which can
+        # repeat that day; adding the zero keeps the compounded returns unchanged, and days with
+        # no return stay NaN rather than becoming 0
+        returns[strategy_name] = pd.concat(monthly_returns.values()).groupby(level=0).sum(min_count=1)
+
+    kospi_daily_returns = None
+    if not args.no_kospi:
+        from ..evaluation import fetch_kospi_data
+        kospi_daily_returns = fetch_kospi_data(DEFAULT_START_DATE, DEFAULT_END_DATE)
+    table = evaluate_portfolios(pd.DataFrame(returns), kospi_daily_returns)
+    print(table.to_string())
+    if args.output:
+        table.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    cli()
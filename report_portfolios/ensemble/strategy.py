@@ -0,0 +1,131 @@
+import numpy as np
+from . import STRATEGIES
+from ..score_tensor import weighted_quantiles
+from ..utils import next_month
+
+
+def _per_source(values, func):
+    """Applies a rows x codes function to every (month, source) slice of a month x code x source array."""
+    n_months, n_codes, n_sources = values.shape
+    flat = values.transpose(0, 2, 1).reshape(n_months * n_sources, n_codes)
+    return func(flat).reshape(n_months, n_sources, n_codes).transpose(0, 2, 1)
+
+
+def percentile_ranks(values):
+    """
+    Returns each value's rank within its row scaled to [0, 1], ties sharing their average rank.
+
+    NaN values are not ranked; a row with a single value ranks it 0.5.
+    """
+    n_rows, n_codes = values.shape
+    present = ~np.isnan(values)
+    order = np.argsort(np.where(present, values, np.inf), axis=1, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    positions = np.broadcast_to(np.arange(n_codes), values.shape)
+
+    # Ties form runs in the sorted rows; each run's first and last positions give its average rank
+    starts = np.ones(values.shape, dtype=bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    ends = np.ones(values.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, positions, n_codes - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    count = present.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = np.where(count > 1, (first + last) / 2 / (count - 1), 0.5)
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, scaled, axis=1)
+    return np.where(present, ranks, np.nan)
+
+
+def zscores(values):
+    """Returns each value's distance from its row mean in row standard deviations (0 if the row has no spread)."""
+    present = ~np.isnan(values)
+    count = present.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(present, values, 0.0).sum(axis=1, keepdims=True) / count
+        deviation = np.where(present, values - mean, 0.0)
+        std = np.sqrt((deviation ** 2).sum(axis=1, keepdims=True) / count)
+        scores = np.where(std > 0, deviation / std, 0.0)
+    return np.where(present, scores, np.nan)
+
+
+def blend(tensor, method, min_sources=1):
+    """
+    Combines a tensor's sources into one score per month and code.
+
+    Each source is first put on a common scale within its month, by percentile rank ('rank')
+    or z-score ('zscore'), and the scaled sources are averaged over the ones that scored the
+    code. Codes scored by fewer than min_sources sources get NaN.
+
+    Returns:
+    tuple: Month x code combined scores and the report rows behind them (summed over sources).
+    """
+    scaled = _per_source(tensor.values, percentile_ranks if method == 'rank' else zscores)
+    available = (~np.isnan(scaled)).sum(axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        combined = np.where(available >= max(min_sources, 1), np.nansum(scaled, axis=2) / available, np.nan)
+    return combined, tensor.counts.sum(axis=2)
+
+
+def quantile_masks(values, counts, quantile=0.8, long_only=False):
+    """
+    Selects, for every month at once, the codes at or above the quantile (long) and at or below 1 - quantile (short).
+
+    Quantiles are taken over report rows as codes_at_or_above and codes_at_or_below take them,
+    and codes in both legs are dropped from both, as in static_long_short_selection.
+
+    Returns:
+    tuple: Month x code long and short masks (the short mask is None if long_only).
+    """
+    lower_quantile = round(1 - quantile, 10)  # 1 - 0.8 alone is 0.19999999999999996
+    with np.errstate(invalid='ignore'):
+        long_mask = values >= weighted_quantiles(values, counts, quantile)[:, None]
+        if long_only:
+            return long_mask, None
+        short_mask = values <= weighted_quantiles(values, counts, lower_quantile)[:, None]
+    return long_mask & ~short_mask, short_mask & ~long_mask
+
+
+def agreement_masks(tensor, quantile=0.8, long_only=False):
+    """Keeps the codes that every source puts in the same leg; codes a source did not score are never selected."""
+    long_mask = short_mask = None
+    for i in range(len(tensor.sources)):
+        source_long, source_short = quantile_masks(tensor.values[:, :, i], tensor.counts[:, :, i], quantile, long_only)
+        long_mask = source_long if long_mask is None else long_mask & source_long
+        if not long_only:
+            short_mask = source_short if short_mask is None else short_mask & source_short
+    return long_mask, short_mask
+
+
+def select_codes(strategy_name, tensor, quantile=0.8, min_sources=1):
+    """
+    Runs the selection step of one of STRATEGIES for every month of a score tensor.
+
+    Codes are selected from a month's scores and held during the next month, as the analyst
+    strategies hold the previous month's signals.
+
+    Args:
+    strategy_name (str): Name of the strategy.
+    tensor (ScoreTensor): Aligned scores; its months are the score months.
+    quantile (float): Long quantile cutoff; long-short strategies short scores at or below 1 - quantile.
+    min_sources (int): Sources that must score a code for the blends to rank it.
+
+    Returns:
+    tuple: Holding month -> long codes, and holding month -> short codes (None for long-only strategies).
+    """
+    if strategy_name not in STRATEGIES:
+        raise ValueError(f"Strategy {strategy_name} is not recognized.")
+    long_only = strategy_name.endswith('long_only')
+    if strategy_name.startswith('agreement'):
+        long_mask, short_mask = agreement_masks(tensor, quantile, long_only)
+    else:
+        combined, counts = blend(tensor, 'rank' if strategy_name.startswith('rank_average') else 'zscore', min_sources)
+        long_mask, short_mask = quantile_masks(combined, counts, quantile, long_only)
+
+    codes = np.array(tensor.codes, dtype=object)
+    long_codes = {next_month(month): codes[long_mask[i]].tolist() for i, month in enumerate(tensor.months)}
+    if short_mask is None:
+        return long_codes, None
+    return long_codes, {next_month(month): codes[short_mask[i]].tolist() for i, month in enumerate(tensor.months)}
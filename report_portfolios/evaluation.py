@@ -0,0 +1,277 @@
+import pandas as pd
+import numpy as np
+
+def fetch_kospi_data(start_date, end_date):
+    """Returns KOSPI daily returns from the local benchmark store, which fetches only the dates it does not hold yet."""
+    from .benchmark_store import fetch_benchmark_data
+    return fetch_benchmark_data(['KOSPI'], start_date, end_date)['KOSPI'].rename('Close')
+
+def evaluate_portfolio(port_daily_returns, kospi_daily_returns, dataset_name, verbose=True):
+    """Evaluates and compares the performance of the portfolio and KOSPI, printing the results if verbose."""
+    port_cumul_returns = (1 + port_daily_returns).cumprod()
+    kospi_cumul_returns = (1 + kospi_daily_returns).cumprod()
+
+    num_years = (port_daily_returns.index[-1] - port_daily_returns.index[0]).days / 365.25
+    port_annualized_return = (port_cumul_returns.iloc[-1] / port_cumul_returns.iloc[0]) ** (1/num_years) - 1
+    kospi_annualized_return = (kospi_cumul_returns.iloc[-1] / kospi_cumul_returns.iloc[0]) ** (1/num_years) - 1
+
+    port_volatility = port_daily_returns.std() * np.sqrt(252)
+    kospi_volatility = kospi_daily_returns.std() * np.sqrt(252)
+
+    sharpe_ratio_port = port_annualized_return / port_volatility
+    sharpe_ratio_kospi = kospi_annualized_return / kospi_volatility
+
+    mdd_port = (port_cumul_returns / port_cumul_returns.cummax() - 1).min()
+    mdd_kospi = (kospi_cumul_returns / kospi_cumul_returns.cummax() - 1).min()
+
+    results = {
+        'port_annualized_return': port_annualized_return,
+        'kospi_annualized_return': kospi_annualized_return,
+        'port_volatility': port_volatility,
+        'kospi_volatility': kospi_volatility,
+        'sharpe_ratio_port': sharpe_ratio_port,
+        'sharpe_ratio_kospi': sharpe_ratio_kospi,
+        'mdd_port': mdd_port,
+        'mdd_kospi': mdd_kospi
+    }
+    if verbose:
+        print_evaluation(results, dataset_name)
+    return results
+
+
+def print_evaluation(results, dataset_name):
+    """Prints the results of evaluate_portfolio."""
+    print("Annualised Return")
+    print(f"{dataset_name} Annualised Return: {results['port_annualized_return'] * 100:.2f}%")
+    print(f"KOSPI Annualised Return: {results['kospi_annualized_return'] * 100:.2f}%")
+
+    print("\nAnnualised Volatility")
+    print(f"{dataset_name} Annualised Volatility: {results['port_volatility'] * 100:.2f}%")
+    print(f"KOSPI Annualised Volatility: {results['kospi_volatility'] * 100:.2f}%")
+
+    print("\nSharpe Ratio")
+    print(f"{dataset_name} Annualised Sharpe Ratio: {results['sharpe_ratio_port']:.4f}")
+    print(f"KOSPI Sharpe Ratio: {results['sharpe_ratio_kospi']:.4f}")
+
+    print("\nMDD")
+    print(f"{dataset_name} MDD: {results['mdd_port'] * 100:.2f}%")
+    print(f"KOSPI MDD: {results['mdd_kospi'] * 100:.2f}%")
+
+
+class RunningMetrics:
+    """
+    Accumulates the metrics of evaluate_portfolio over daily returns fed in date order, chunk by chunk.
+
+    Only running totals are kept (growth, peak, drawdown, and the count, mean and squared
+    deviations of the returns), so memory does not grow with the length of the history. Growth
+    and drawdowns are multiplied out in the same order as cumprod and cummax, so the annualised
+    return and MDD are exactly those of evaluate_portfolio. Chunk variances are merged with
+    Chan's formula, so the volatility agrees to floating-point rounding. NaN returns are skipped
+    as pandas skips them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.squared_deviations = 0.0
+        self.growth = 1.0
+        self.peak = -np.inf
+        self.mdd = np.nan
+        self.first_date = self.last_date = None
+        self.first_growth = self.last_growth = np.nan
+
+    def update(self, daily_returns):
+        """Adds the next chunk of daily returns (a date-indexed Series following the previous chunk)."""
+        if len(daily_returns) == 0:
+            return
+        values = daily_returns.to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        cumul = np.cumprod(np.concatenate([[self.growth], np.where(valid, 1 + values, 1.0)]))[1:]
+        if self.first_date is None:
+            self.first_date, self.first_growth = daily_returns.index[0], cumul[0] if valid[0] else np.nan
+        self.last_date, self.last_growth = daily_returns.index[-1], cumul[-1] if valid[-1] else np.nan
+        self.growth = cumul[-1]
+
+        if valid.any():
+            cumul = cumul[valid]
+            peak = np.maximum.accumulate(np.concatenate([[self.peak], cumul]))[1:]
+            self.peak = peak[-1]
+            self.mdd = np.fmin(self.mdd, (cumul / peak - 1).min())
+
+            chunk = values[valid]
+            chunk_mean = chunk.mean()
+            total = self.count + len(chunk)
+            delta = chunk_mean - self.mean
+            self.squared_deviations += ((chunk - chunk_mean) ** 2).sum() + delta ** 2 * self.count * len(chunk) / total
+            self.mean += delta * len(chunk) / total
+            self.count = total
+
+    def num_years(self):
+        """Returns the span from the first to the last date fed, in years."""
+        return (self.last_date - self.first_date).days / 365.25
+
+    def annualized_return(self, num_years=None):
+        num_years = self.num_years() if num_years is None else num_years
+        return (self.last_growth / self.first_growth) ** (1 / num_years) - 1
+
+    def volatility(self):
+        return np.sqrt(self.squared_deviations / (self.count - 1)) * np.sqrt(252) if self.count > 1 else np.nan
+
+
+def evaluate_portfolio_stream(port_daily_returns, kospi_daily_returns, dataset_name, verbose=True):
+    """
+    Evaluates a portfolio whose daily returns arrive in chunks, e.g. month by month from a generator.
+
+    Args:
+    port_daily_returns (iterable): Date-indexed Series of daily returns, in date order.
+    kospi_daily_returns (pd.Series): Benchmark daily returns.
+    dataset_name (str): Name printed with the portfolio's results.
+    verbose (bool): Print the results.
+
+    Returns:
+    dict: The results of evaluate_portfolio for the concatenated returns.
+    """
+    port, kospi = RunningMetrics(), RunningMetrics()
+    for chunk in port_daily_returns:
+        port.update(chunk)
+    kospi.update(kospi_daily_returns)
+
+    # As in evaluate_portfolio, KOSPI is annualised over the portfolio's span
+    num_years = port.num_years()
+    port_annualized_return = port.annualized_return(num_years)
+    kospi_annualized_return = kospi.annualized_return(num_years)
+    port_volatility, kospi_volatility = port.volatility(), kospi.volatility()
+    results = {
+        'port_annualized_return': port_annualized_return,
+        'kospi_annualized_return': kospi_annualized_return,
+        'port_volatility': port_volatility,
+        'kospi_volatility': kospi_volatility,
+        'sharpe_ratio_port': port_annualized_return / port_volatility,
+        'sharpe_ratio_kospi': kospi_annualized_return / kospi_volatility,
+        'mdd_port': port.mdd,
+        'mdd_kospi': kospi.mdd
+    }
+    if verbose:
+        print_evaluation(results, dataset_name)
+    return results
+
+
+def _cumulative_returns(values):
+    """Column-wise cumulative growth of 1; NaN returns (days a portfolio did not trade) count as 0."""
+    return np.cumprod(1 + np.nan_to_num(values, nan=0.0), axis=0)
+
+
+def drawdowns(port_daily_returns):
+    """Returns the drawdown from the running peak of every portfolio column on every date."""
+    cumul = _cumulative_returns(port_daily_returns.to_numpy(dtype=np.float64))
+    return pd.DataFrame(cumul / np.maximum.accumulate(cumul, axis=0) - 1,
+                        index=port_daily_returns.index, columns=port_daily_returns.columns)
+
+
+def drawdown_durations(port_daily_returns):
+    """Returns, for every portfolio column and date, the number of trading days since the last peak."""
+    cumul = _cumulative_returns(port_daily_returns.to_numpy(dtype=np.float64))
+    positions = np.arange(len(cumul))[:, None]
+    at_peak = cumul >= np.maximum.accumulate(cumul, axis=0)
+    last_peak = np.maximum.accumulate(np.where(at_peak, positions, 0), axis=0)
+    return pd.DataFrame(positions - last_peak, index=port_daily_returns.index, columns=port_daily_returns.columns)
+
+
+def rolling_sharpe(port_daily_returns, window=252):
+    """
+    Returns the Sharpe ratio of every portfolio column over a trailing window of trading days.
+
+    Like evaluate_portfolio, it is the annualised compound return divided by the annualised
+    volatility, here over the window only; dates with fewer than window returns are NaN.
+    """
+    values = port_daily_returns.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    pad = np.zeros((1, values.shape[1]))
+    log_growth = np.vstack([pad, np.cumsum(np.log1p(filled), axis=0)])
+    sums = np.vstack([pad, np.cumsum(filled, axis=0)])
+    squares = np.vstack([pad, np.cumsum(filled ** 2, axis=0)])
+    counts = np.vstack([pad, np.cumsum(valid, axis=0)])
+
+    result = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        n = counts[window:] - counts[:-window]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            annualized_return = np.exp((log_growth[window:] - log_growth[:-window]) * 252 / n) - 1
+            mean = (sums[window:] - sums[:-window]) / n
+            variance = ((squares[window:] - squares[:-window]) - n * mean ** 2) / (n - 1)
+            result[window - 1:] = annualized_return / (np.sqrt(np.maximum(variance, 0)) * np.sqrt(252))
+    return pd.DataFrame(result, index=port_daily_returns.index, columns=port_daily_returns.columns)
+
+
+def _column_metrics(values, dates, num_years=None):
+    """
+    Computes the evaluate_portfolios metrics of every column of a dates x portfolios array.
+
+    Each column is annualised over its own span from its first to its last valid return,
+    unless num_years gives the span to use instead.
+    """
+    valid = ~np.isnan(values)
+    first = valid.argmax(axis=0)
+    last = len(values) - 1 - valid[::-1].argmax(axis=0)
+    if num_years is None:
+        num_years = (dates[last] - dates[first]).days.to_numpy() / 365.25
+
+    cumul = _cumulative_returns(values)
+    columns = np.arange(values.shape[1])
+    annualized_return = (cumul[last, columns] / cumul[first, columns]) ** (1 / num_years) - 1
+    volatility = np.nanstd(values, axis=0, ddof=1) * np.sqrt(252)
+    running_peak = np.maximum.accumulate(cumul, axis=0)
+    mdd = (cumul / running_peak - 1).min(axis=0)
+
+    positions = np.arange(len(values))[:, None]
+    last_peak = np.maximum.accumulate(np.where(cumul >= running_peak, positions, 0), axis=0)
+    max_drawdown_days = (positions - last_peak).max(axis=0)
+
+    return {
+        'annualized_return': annualized_return,
+        'volatility': volatility,
+        'sharpe_ratio': annualized_return / volatility,
+        'mdd': mdd,
+        'max_drawdown_days': max_drawdown_days,
+    }
+
+
+def evaluate_portfolios(port_daily_returns, kospi_daily_returns=None, verbose=False):
+    """
+    Evaluates many portfolios at once.
+
+    Every metric is computed column-wise in one pass with the definitions of evaluate_portfolio,
+    each portfolio over its own span from its first to its last valid return. KOSPI is evaluated
+    once and added as a 'KOSPI' row (or one row per benchmark column); as in evaluate_portfolio,
+    it is annualised over the portfolios' span, from their first to their last valid return.
+
+    Args:
+    port_daily_returns (pd.DataFrame): Dates x portfolios daily returns; NaN where a portfolio has no return.
+    kospi_daily_returns (pd.Series or pd.DataFrame): Benchmark daily returns (a DataFrame for several
+        benchmarks, e.g. from fetch_benchmark_data), or None to leave the benchmark out.
+    verbose (bool): Print the metrics table.
+
+    Returns:
+    pd.DataFrame: One row per portfolio with annualized_return, volatility, sharpe_ratio, mdd and
+    max_drawdown_days (longest stretch of trading days below a previous peak).
+    """
+    values = port_daily_returns.to_numpy(dtype=np.float64)
+    dates = port_daily_returns.index
+    metrics = pd.DataFrame(_column_metrics(values, dates), index=port_daily_returns.columns)
+
+    if kospi_daily_returns is not None:
+        benchmarks = kospi_daily_returns.to_frame('KOSPI') if isinstance(kospi_daily_returns, pd.Series) else kospi_daily_returns
+        clashes = [name for name in benchmarks.columns if name in port_daily_returns.columns]
+        if clashes:
+            raise ValueError(f"Portfolio columns {clashes} clash with the benchmark rows; rename them.")
+        valid = ~np.isnan(values).all(axis=1)
+        num_years = (dates[valid].max() - dates[valid].min()).days / 365.25
+        benchmark_metrics = pd.DataFrame(_column_metrics(benchmarks.to_numpy(dtype=np.float64), benchmarks.index, num_years),
+                                         index=benchmarks.columns)
+        metrics = pd.concat([metrics, benchmark_metrics])
+    metrics.index.name = 'portfolio'
+
+    if verbose:
+        print(metrics.to_string())
+    return metrics
@@ -0,0 +1,192 @@
+"""
+Event study of report dates: the return of buying a code after each report and holding it for N trading days.
+
+Both strategy families bucket reports by month and rebalance at month ends. This module uses
+the exact report dates instead. Each report is an event: the code is bought at the close of
+the first trading day after the report date and sold at the close N trading days later.
+
+Every code's closes are turned once into cumulative log returns over the trading calendar, so
+an event's return over any holding period is the difference of two entries of that array. Entry
+rows are found for all events at once with searchsorted, and a run over hundreds of thousands
+of reports is a handful of array gathers.
+"""
+import argparse
+import logging
+from .config import DATA_PATH, DEFAULT_TRANSACTION_COST
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_HORIZONS = [5, 20, 60]
+
+
+def cumulative_log_returns(panel, columns):
+    """
+    Returns the cumulative log returns of panel columns on every trading day.
+
+    On days a code did not trade its last close is carried forward, so the value stays flat;
+    rows before its first close are NaN.
+    """
+    import numpy as np
+    from .return_engine import forward_fill
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(forward_fill(np.asarray(panel.close)[:, columns]))
+
+
+def benchmark_cumulative_log_returns(benchmark_daily_returns, dates):
+    """
+    Returns the benchmark's cumulative log return up to each date.
+
+    Each date takes the benchmark's value on its last trading day at or before it, so the
+    benchmark does not need to trade on exactly the panel's days.
+    """
+    import numpy as np
+    benchmark_daily_returns = benchmark_daily_returns.dropna().sort_index()
+    cumulative = np.concatenate([[0.0], np.cumsum(np.log1p(benchmark_daily_returns.to_numpy(dtype=np.float64)))])
+    positions = np.searchsorted(benchmark_daily_returns.index.values, dates.values.astype(benchmark_daily_returns.index.values.dtype), side='right')
+    return cumulative[positions]
+
+
+def event_returns(events, horizons=DEFAULT_HORIZONS, transaction_cost=0.0, benchmark_daily_returns=None, panel=None):
+    """
+    Computes the holding-period return of every report event at each horizon.
+
+    An event enters at the close of the first trading day after its report date; the code must
+    have traded that day. It exits at the close horizon trading days later, or at the code's last
+    close before then if it stopped trading. Events whose code has no prices, that did not trade
+    on the entry day, or whose exit falls after the last trading day get NaN.
+
+    Args:
+    events (pd.DataFrame): Date-indexed reports or signals with a 'code' column.
+    horizons (list): Holding periods in trading days.
+    transaction_cost (float): One-way transaction cost, charged on entry and on exit.
+    benchmark_daily_returns (pd.Series): Benchmark daily returns (e.g. KOSPI); if given, excess
+        returns over the benchmark's return across the same days are added.
+    panel (PricePanel): Price panel; defaults to the panel under DATA_PATH.
+
+    Returns:
+    pd.DataFrame: The events with 'entry_date', a 'return_{N}' column per horizon and, with a
+    benchmark, an 'excess_{N}' column per horizon.
+    """
+    import numpy as np
+    import pandas as pd
+    from .price_panel import open_price_panel
+    from .trading_calendar import trading_calendar
+    panel = open_price_panel(DATA_PATH) if panel is None else panel
+    calendar = trading_calendar(panel)
+    dates = calendar.dates
+    n_days = len(dates)
+    result = events.copy()
+
+    report_dates = pd.DatetimeIndex(events.index).values.astype(dates.values.dtype)
+    entry = np.searchsorted(dates.values, report_dates, side='right')
+
+    codes, event_codes = np.unique(events['code'].to_numpy().astype(str), return_inverse=True)
+    positions = pd.Index(panel.codes).get_indexer(codes)
+    priced = positions >= 0
+    # Codes without prices get a column of NaN closes
+    log_prices = np.full((n_days + 1, len(codes)), np.nan)
+    log_prices[:n_days, priced] = cumulative_log_returns(panel, positions[priced])
+    if benchmark_daily_returns is not None:
+        benchmark = np.append(benchmark_cumulative_log_returns(benchmark_daily_returns, dates), np.nan)
+
+    # entry and exit rows past the last trading day point at the trailing NaN row
+    enterable = (entry < n_days) & priced[event_codes]
+    entry_close = np.full(len(events), np.nan)
+    entry_close[enterable] = panel.close[entry[enterable], positions[event_codes[enterable]]]
+    entry_log = np.where(np.isnan(entry_close), np.nan, log_prices[entry, event_codes])
+
+    result['entry_date'] = pd.DatetimeIndex(dates.values[np.minimum(entry, n_days - 1)]).where(entry < n_days)
+    for horizon in horizons:
+        exit_row = np.where(entry + horizon < n_days, entry + horizon, n_days)
+        log_return = log_prices[exit_row, event_codes] - entry_log
+        result[f'return_{horizon}'] = np.expm1(log_return) - 2 * transaction_cost
+        if benchmark_daily_returns is not None:
+            result[f'excess_{horizon}'] = result[f'return_{horizon}'] - np.expm1(benchmark[exit_row] - benchmark[entry])
+    return result
+
+
+
+def summarize_events(returns, horizons=DEFAULT_HORIZONS, by=None):
+    """
+    Summarizes event returns per horizon, and per group of events if by is given.
+
+    Events that overlap in time are not independent, so the t-statistics overstate the
+    evidence when reports on the same code or days cluster.
+
+    Args:
+    returns (pd.DataFrame): Output of event_returns.
+    horizons (list): Horizons to summarize.
+    by (str or pd.Series): Column name or per-event labels to group by; all events form one group otherwise.
+
+    Returns:
+    pd.DataFrame: Count, mean, median, standard deviation, t-statistic and share of positive
+    values of every 'return_{N}' and 'excess_{N}' column, indexed by (group, column).
+    """
+    import numpy as np
+    import pandas as pd
+    columns = [f'{kind}_{horizon}' for horizon in horizons for kind in ('return', 'excess') if f'{kind}_{horizon}' in returns]
+    labels = returns[by] if isinstance(by, str) else ('all' if by is None else by)
+    stacked = returns[columns].assign(group=labels).melt(id_vars='group', var_name='column').dropna(subset=['value'])
+    stacked['column'] = pd.Categorical(stacked['column'], categories=columns)
+    stacked['positive'] = stacked['value'] > 0
+    grouped = stacked.groupby(['group', 'column'], observed=True)
+    table = grouped['value'].agg(['count', 'mean', 'median', 'std'])
+    table['t_stat'] = table['mean'] / (table['std'] / np.sqrt(table['count']))
+    table['hit_rate'] = grouped['positive'].mean()
+    return table
+
+
+def load_events(dataset_name, strategy_name=None):
+    """
+    Loads ./score/{dataset_name}.csv as events: every report, or the buy signals of an analyst strategy.
+    """
+    from .score_store import load_scores
+    df = load_scores(f'./score/{dataset_name}.csv')
+    if strategy_name is None:
+        return df
+    if 'score' not in df:
+        raise ValueError(f"Strategy {strategy_name} needs analyst scores ('score' column).")
+    from .analyst.strategy import generate_buy_signals
+    return generate_buy_signals(strategy_name, df)
+
+
+def cli(argv=None):
+    from .analyst import STRATEGIES
+    parser = argparse.ArgumentParser(description='Returns of holding each reported code for N trading days after the report.')
+    parser.add_argument('--dataset_name', required=True, help='Name of the dataset (excluding .csv)')
+    parser.add_argument('--horizons', nargs='+', type=int, default=DEFAULT_HORIZONS, help='Holding periods in trading days')
+    parser.add_argument('--strategy_name', default=None, choices=STRATEGIES, help='Use the buy signals of this analyst strategy instead of every report')
+    parser.add_argument('--group_by', default=None, help="Summarize per value of this column, e.g. 'score'")
+    parser.add_argument('--buckets', type=int, default=None, help='Summarize per quantile bucket of the --group_by column instead (1 = lowest)')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='One-way transaction cost, charged on entry and exit')
+    parser.add_argument('--no_kospi', action='store_true', help='Leave out the returns in excess of KOSPI (no download)')
+    parser.add_argument('--output', default=None, help='Also write every event with its returns to this CSV')
+    args = parser.parse_args(argv)
+    if any(horizon < 1 for horizon in args.horizons):
+        parser.error("horizons must be at least one trading day")
+    if args.buckets is not None and args.group_by is None:
+        parser.error("--buckets needs --group_by")
+
+    import pandas as pd
+    from .prices import get_price_data
+    events = load_events(args.dataset_name, args.strategy_name)
+    if args.group_by is not None and args.group_by not in events:
+        parser.error(f"column {args.group_by} is not in the dataset")
+    get_price_data(events['code'].unique())
+    kospi_daily_returns = None
+    if not args.no_kospi:
+        from .evaluation import fetch_kospi_data
+        kospi_daily_returns = fetch_kospi_data(events.index.min().strftime('%Y-%m-%d'), None)
+
+    logging.info(f"Computing the returns of {len(events)} events at horizons {args.horizons}")
+    returns = event_returns(events, args.horizons, args.transaction_cost, kospi_daily_returns)
+    by = args.group_by
+    if args.buckets is not None:
+        by = pd.qcut(returns[args.group_by], args.buckets, labels=False, duplicates='drop').astype('Int64') + 1
+    print(summarize_events(returns, args.horizons, by).to_string())
+    if args.output:
+        returns.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    cli()
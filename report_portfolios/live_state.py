@@ -0,0 +1,22 @@
+import os
+import pickle
+from .config import LIVE_STATE_PATH
+from .utils import mkdir
+
+
+def state_file(dataset_name, strategy_name, state_dir=LIVE_STATE_PATH):
+    return os.path.join(state_dir, f'{dataset_name}_{strategy_name}.pkl')
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_state(state, path):
+    mkdir(os.path.dirname(path))
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .config import DATA_PATH
+from .price_panel import open_price_panel
+
+
+def _init_worker(file_path):
+    # Per-month tasks would each draw a progress bar
+    os.environ['TQDM_DISABLE'] = '1'
+    # The close matrix is memory-mapped, so every worker reads the same pages of one file
+    open_price_panel(file_path)
+
+
+def _run_task(task):
+    compute, args = task
+    return list(compute(*args))
+
+
+def month_chunks(months, chunk_months):
+    """Splits months, in order, into consecutive chunks of chunk_months months."""
+    return [months[i:i + chunk_months] for i in range(0, len(months), chunk_months)]
+
+
+def selections_in(selections, months):
+    """Returns the part of a month -> codes selection that covers months (None stays None)."""
+    if selections is None:
+        return None
+    return {month: selections[month] for month in months if month in selections}
+
+
+def run_month_tasks(tasks, max_workers=None, file_path=DATA_PATH):
+    """
+    Runs month tasks on a process pool and yields their (month, returns) pairs in task order.
+
+    Each task is a (function, args) pair whose function yields (month, returns) pairs for its
+    months; functions must be importable module-level functions so the workers can run them.
+    Tasks are merged in the order they were given, whatever order the workers finish in, so
+    the output is the one of running the tasks one after the other.
+
+    Args:
+    tasks (list): (function, args) pairs.
+    max_workers (int): Worker processes (default: number of CPUs; 1 runs in this process).
+    file_path (str): Price directory whose panel the workers map.
+
+    Yields:
+    tuple: Month and its pd.Series of portfolio daily returns.
+    """
+    if max_workers == 1 or len(tasks) <= 1:
+        for compute, args in tasks:
+            yield from compute(*args)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(file_path,)) as executor:
+        for pairs in executor.map(_run_task, tasks):
+            yield from pairs
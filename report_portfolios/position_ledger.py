@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+LEGS = ('long', 'short')
+
+
+class PositionLedger:
+    """
+    Sparse month x code weights of a portfolio's long and short legs.
+
+    Each leg keeps only its held positions as parallel arrays of month positions, code
+    positions and weights, sorted by month and code. Every leg is equally weighted within a
+    month and sums to 1 (0 in months it holds nothing); short weights are stored as positive
+    numbers. Turnover, names and exposures are computed for all months at once from these
+    arrays, so nothing loops over months or codes after the ledger is built.
+    """
+
+    def __init__(self, months, codes, positions):
+        self.months = list(months)
+        self.codes = list(codes)
+        # leg -> (month positions, code positions, weights)
+        self.positions = positions
+
+    @classmethod
+    def from_selections(cls, months, long_codes, short_codes=None):
+        """
+        Builds the ledger of equal-weight legs from per-month code selections.
+
+        Args:
+        months (list): Holding months ('YYYY-MM'), in order.
+        long_codes (dict): Month -> codes held long during that month.
+        short_codes (dict): Month -> codes sold short, or None for long-only portfolios.
+
+        Returns:
+        PositionLedger: The ledger over months.
+        """
+        selections = {'long': long_codes, 'short': short_codes or {}}
+        held = {leg: [sorted(set(selections[leg].get(month, []))) for month in months] for leg in LEGS}
+        codes = sorted({code for leg in LEGS for month_codes in held[leg] for code in month_codes})
+        code_index = pd.Index(codes)
+
+        positions = {}
+        for leg in LEGS:
+            counts = np.array([len(month_codes) for month_codes in held[leg]], dtype=np.int64)
+            rows = np.repeat(np.arange(len(months), dtype=np.int64), counts)
+            flat = [code for month_codes in held[leg] for code in month_codes]
+            cols = code_index.get_indexer(flat).astype(np.int64) if flat else np.array([], dtype=np.int64)
+            weights = 1.0 / counts[rows] if len(rows) else np.array([], dtype=np.float64)
+            positions[leg] = (rows, cols, weights)
+        return cls(months, codes, positions)
+
+    def weights(self, leg='long'):
+        """Returns a leg's weights as a dense month x code DataFrame (0 where a code is not held)."""
+        rows, cols, weights = self.positions[leg]
+        dense = np.zeros((len(self.months), len(self.codes)))
+        dense[rows, cols] = weights
+        return pd.DataFrame(dense, index=pd.Index(self.months, name='month'), columns=self.codes)
+
+    def holdings(self):
+        """Returns every position as a long-format frame with month, leg, code and weight columns."""
+        frames = []
+        for leg in LEGS:
+            rows, cols, weights = self.positions[leg]
+            frames.append(pd.DataFrame({'month': np.array(self.months, dtype=object)[rows], 'leg': leg,
+                                        'code': np.array(self.codes, dtype=object)[cols], 'weight': weights}))
+        return pd.concat(frames, ignore_index=True)
+
+    def _month_sums(self, values, rows):
+        return np.bincount(rows, weights=values, minlength=len(self.months))
+
+    def names(self, leg='long'):
+        """Returns the number of codes a leg holds in each month."""
+        return np.bincount(self.positions[leg][0], minlength=len(self.months))
+
+    def exposure(self, leg='long'):
+        """Returns the sum of a leg's weights in each month (1, or 0 if it holds nothing)."""
+        rows, _, weights = self.positions[leg]
+        return self._month_sums(weights, rows)
+
+    def turnover(self, leg='long'):
+        """
+        Returns the weight a leg trades at the start of each month: the sum over codes of the
+        absolute change from the previous month's weight, with the first month bought from cash.
+
+        A leg that keeps its codes trades nothing, one that replaces all of them trades 2 (1 sold
+        and 1 bought). Weights drift between rebalances are ignored.
+        """
+        rows, cols, weights = self.positions[leg]
+        n_months = len(self.months)
+        # Each position enters its month with its weight and leaves the next month with minus it;
+        # summing both by (code, month) key gives every weight change
+        keys = np.concatenate([cols * (n_months + 1) + rows, cols * (n_months + 1) + rows + 1])
+        changes = np.concatenate([weights, -weights])
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        change = np.bincount(inverse, weights=changes)
+        change_months = unique_keys % (n_months + 1)
+        inside = change_months < n_months
+        return self._month_sums(np.abs(change[inside]), change_months[inside])
+
+    def cost_drag(self, transaction_cost):
+        """Returns the cost of each month's rebalancing: transaction_cost per unit of weight traded on either leg."""
+        return transaction_cost * (self.turnover('long') + self.turnover('short'))
+
+    def summary(self, transaction_cost=0.0):
+        """
+        Returns the ledger's monthly statistics.
+
+        Returns:
+        pd.DataFrame: Month-indexed n_long, n_short, long_turnover, short_turnover, gross_exposure,
+        net_exposure and cost_drag.
+        """
+        long_exposure, short_exposure = self.exposure('long'), self.exposure('short')
+        return pd.DataFrame({
+            'n_long': self.names('long'),
+            'n_short': self.names('short'),
+            'long_turnover': self.turnover('long'),
+            'short_turnover': self.turnover('short'),
+            'gross_exposure': long_exposure + short_exposure,
+            'net_exposure': long_exposure - short_exposure,
+            'cost_drag': self.cost_drag(transaction_cost),
+        }, index=pd.Index(self.months, name='month'))
+
+
+def charge_cost_drag(monthly_returns, ledger, transaction_cost):
+    """
+    Subtracts each month's turnover cost from the first daily return of its month.
+
+    Args:
+    monthly_returns (iterable): (month, pd.Series of daily returns) pairs computed without costs.
+    ledger (PositionLedger): Ledger of the months.
+    transaction_cost (float): Cost per unit of weight traded.
+
+    Yields:
+    tuple: Month and its daily returns net of the month's cost drag.
+    """
+    drag = dict(zip(ledger.months, ledger.cost_drag(transaction_cost)))
+    for month, returns in monthly_returns:
+        if len(returns) and drag.get(month, 0.0):
+            returns = returns.sort_index().astype(np.float64)
+            returns.iloc[0] -= drag[month]
+        yield month, returns
@@ -0,0 +1,116 @@
+import os
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .config import DATA_PATH, PRICE_CACHE_MAX_BYTES
+from .price_panel import open_price_panel
+from .profiling import count
+
+_price_caches = {}
+
+
+class PriceCache:
+    """
+    Keeps parsed, date-indexed price frames in memory with least-recently-used eviction.
+
+    Frames come from the memory-mapped price panel, or from {code}.csv for codes the panel
+    does not hold yet. get_close keeps a code's closes on the panel's trading calendar instead,
+    for code that slices months by row position. The total size of the cached values never
+    exceeds max_bytes.
+    """
+
+    def __init__(self, file_path=DATA_PATH, max_bytes=PRICE_CACHE_MAX_BYTES):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._frames = OrderedDict()
+        self._panel = None
+
+    def __len__(self):
+        return len(self._frames)
+
+    def clear(self):
+        self._frames.clear()
+        self.current_bytes = 0
+
+    def _lookup(self, key):
+        panel = open_price_panel(self.file_path)
+        if panel is not self._panel:
+            # The panel was rebuilt, so every cached value may be stale
+            self.clear()
+            self._panel = panel
+
+        if key in self._frames:
+            self.hits += 1
+            self._frames.move_to_end(key)
+            return panel, self._frames[key][0]
+        self.misses += 1
+        return panel, None
+
+    def _read_csv(self, code):
+        count('csv_reads', code=code)
+        return pd.read_csv(os.path.join(self.file_path, f'{code}.csv'), parse_dates=['Date'], index_col='Date')
+
+    def get_frame(self, code):
+        """Returns the date-indexed price frame of a code, loading it on a miss."""
+        panel, frame = self._lookup(code)
+        if frame is None:
+            frame = panel.get_frame(code) if code in panel else self._read_csv(code)
+            self._store(code, frame, int(frame.memory_usage(index=True, deep=True).sum()))
+        return frame
+
+    def get_close(self, code):
+        """Returns the closes of a code on every row of the panel's calendar (NaN where it did not trade)."""
+        panel, close = self._lookup(('close', code))
+        if close is None:
+            if code in panel:
+                close = np.array(panel.close[:, panel.column(code)])
+            else:
+                frame = self._read_csv(code)
+                close = frame['Close'][~frame.index.duplicated(keep='last')].reindex(panel.dates).to_numpy(dtype=np.float64)
+            self._store(('close', code), close, close.nbytes)
+        return close
+
+    def resize(self, max_bytes):
+        """Changes the memory budget, evicting the oldest frames if it shrank."""
+        self.max_bytes = max_bytes
+        self._evict(0)
+
+    def _store(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        self._evict(size)
+        self._frames[key] = (value, size)
+        self.current_bytes += size
+
+    def _evict(self, incoming_bytes):
+        while self._frames and self.current_bytes + incoming_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._frames.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self):
+        """Returns the hit/miss/eviction counters and the current memory usage."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'cached_codes': len(self._frames),
+            'current_bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+
+def get_price_cache(file_path=DATA_PATH, max_bytes=None):
+    """Returns the process-wide cache for file_path, resizing it when max_bytes is given."""
+    key = os.path.abspath(file_path)
+    if key not in _price_caches:
+        _price_caches[key] = PriceCache(file_path, PRICE_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+    elif max_bytes is not None:
+        _price_caches[key].resize(max_bytes)
+    return _price_caches[key]
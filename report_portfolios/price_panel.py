@@ -0,0 +1,118 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from .config import DATA_PATH, PANEL_DIR
+from .utils import mkdir
+from .profiling import count
+
+_open_panels = {}
+
+
+class PricePanel:
+    """Dates x codes close-price matrix backed by memory-mapped .npy files."""
+
+    def __init__(self, dates, codes, close):
+        self.dates = pd.DatetimeIndex(dates)
+        self.codes = list(codes)
+        self.close = close
+        self._columns = {code: i for i, code in enumerate(self.codes)}
+
+    def __contains__(self, code):
+        return code in self._columns
+
+    def __len__(self):
+        return len(self.codes)
+
+    def column(self, code):
+        """Returns the column position of a code (KeyError if it is not stored)."""
+        return self._columns[code]
+
+    def get_close(self, code):
+        """Returns the close prices of a code over the days it traded."""
+        values = np.asarray(self.close[:, self._columns[code]])
+        traded = ~np.isnan(values)
+        return pd.Series(values[traded], index=self.dates[traded], name='Close')
+
+    def get_frame(self, code):
+        """Returns a date-indexed frame with a 'Close' column, shaped like the per-code CSVs."""
+        frame = self.get_close(code).to_frame()
+        frame.index.name = 'Date'
+        return frame
+
+
+def _panel_files(file_path):
+    panel_path = os.path.join(file_path, PANEL_DIR)
+    return {name: os.path.join(panel_path, f'{name}.npy') for name in ('dates', 'codes', 'close')}
+
+
+def panel_is_stale(codes, file_path=DATA_PATH):
+    """Checks whether the panel is missing, lacks any of the codes or is older than a price CSV."""
+    files = _panel_files(file_path)
+    if not all(os.path.exists(path) for path in files.values()):
+        return True
+    stored = set(np.load(files['codes']).tolist())
+    available = [code for code in codes if os.path.exists(f"{file_path}/{code}.csv")]
+    if any(code not in stored for code in available):
+        return True
+    built_at = os.path.getmtime(files['close'])
+    return any(os.path.getmtime(f"{file_path}/{code}.csv") > built_at for code in available)
+
+
+def build_price_panel(file_path=DATA_PATH):
+    """
+    Consolidates every {code}.csv under file_path into one dates x codes close matrix.
+
+    Codes that did not trade on a date are stored as NaN. The matrix is written as float64
+    so the returns computed from it are identical to the ones computed from the CSVs.
+
+    Args:
+    file_path (str): Directory holding the per-code price CSVs.
+
+    Returns:
+    PricePanel: The freshly built panel, opened with memory mapping.
+    """
+    closes = {}
+    for path in sorted(glob.glob(os.path.join(file_path, '*.csv'))):
+        code = os.path.splitext(os.path.basename(path))[0]
+        try:
+            price_df = pd.read_csv(path, usecols=['Date', 'Close'], parse_dates=['Date'], index_col='Date')
+            count('csv_reads')
+            closes[code] = price_df['Close'][~price_df.index.duplicated(keep='last')]
+        except Exception as e:
+            print(f"Error reading price data for code {code}: {e}")
+            count('exceptions', code=code)
+
+    codes = sorted(closes)
+    dates = pd.DatetimeIndex(sorted(set().union(*(s.index for s in closes.values())))) if closes else pd.DatetimeIndex([])
+    close = np.full((len(dates), len(codes)), np.nan, dtype=np.float64)
+    for i, code in enumerate(codes):
+        close[dates.get_indexer(closes[code].index), i] = closes[code].to_numpy(dtype=np.float64)
+
+    mkdir(os.path.join(file_path, PANEL_DIR))
+    files = _panel_files(file_path)
+    # Write next to the targets and swap them in, so readers never see a half-written panel
+    for name, values in (('dates', dates.values.astype('datetime64[D]')), ('codes', np.array(codes, dtype=str)), ('close', close)):
+        tmp_path = files[name] + '.tmp.npy'
+        np.save(tmp_path, values)
+        os.replace(tmp_path, files[name])
+
+    return reopen_price_panel(file_path)
+
+
+def open_price_panel(file_path=DATA_PATH):
+    """Opens the price panel once per process; the close matrix is memory-mapped, not read."""
+    key = os.path.abspath(file_path)
+    if key not in _open_panels:
+        files = _panel_files(file_path)
+        if not os.path.exists(files['close']):
+            return build_price_panel(file_path)
+        _open_panels[key] = PricePanel(np.load(files['dates']), np.load(files['codes']).tolist(),
+                                       np.load(files['close'], mmap_mode='r'))
+    return _open_panels[key]
+
+
+def reopen_price_panel(file_path=DATA_PATH):
+    """Forgets the panel this process has open, so the files on disk (e.g. rebuilt by another process) are mapped again."""
+    _open_panels.pop(os.path.abspath(file_path), None)
+    return open_price_panel(file_path)
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from .config import DATA_PATH, DOWNLOAD_MAX_WORKERS, DOWNLOAD_RETRIES, DOWNLOAD_BACKOFF, PRICE_MANIFEST, REFRESH_OVERLAP_DAYS
+from .profiling import count
+
+
+class PriceSource(ABC):
+    """Interface of a daily price provider; fetch returns a 'Date'-indexed frame with a 'Close' column."""
+
+    @abstractmethod
+    def fetch(self, code, start=None, end=None):
+        """Returns the daily prices of code from start through end (either may be None for an open end)."""
+
+
+class FinanceDataReaderSource(PriceSource):
+    """Downloads prices with FinanceDataReader."""
+
+    def fetch(self, code, start=None, end=None):
+        import FinanceDataReader as fdr
+        return fdr.DataReader(code, start, end)
+
+
+class DirectorySource(PriceSource):
+    """Reads prices from {directory}/{code}.csv files, e.g. fixtures or a copy of another price_data."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, code, start=None, end=None):
+        price_df = pd.read_csv(os.path.join(self.directory, f'{code}.csv'), parse_dates=['Date'], index_col='Date')
+        return _date_range(price_df, start, end)
+
+
+class InMemorySource(PriceSource):
+    """Serves prices from a dict of code -> frame; codes that are missing raise KeyError."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def fetch(self, code, start=None, end=None):
+        return _date_range(self.frames[code], start, end)
+
+
+def _date_range(price_df, start=None, end=None):
+    """Returns the rows from start through end (either may be None for an open end)."""
+    if start is not None:
+        price_df = price_df[price_df.index >= pd.Timestamp(start)]
+    if end is not None:
+        price_df = price_df[price_df.index <= pd.Timestamp(end)]
+    return price_df
+
+
+def fetch_with_retry(source, code, start=None, retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF, require_rows=True, end=None):
+    """Fetches one code, retrying failures (and empty results if require_rows) with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            price_df = source.fetch(code, start) if end is None else source.fetch(code, start, end)
+            if require_rows and (price_df is None or len(price_df) == 0):
+                raise ValueError('no price rows returned')
+            return price_df
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            logging.warning(f"Fetching {code} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _read_manifest(file_path):
+    path = os.path.join(file_path, PRICE_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(file_path, manifest):
+    path = os.path.join(file_path, PRICE_MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _download_full(source, code, file_path, retries, backoff):
+    price_df = fetch_with_retry(source, code, None, retries, backoff)
+    price_df.to_csv(f"{file_path}/{code}.csv")
+    return pd.Timestamp(price_df.index.max()).strftime('%Y-%m-%d')
+
+
+def _refresh_tail(source, code, file_path, last_date, overlap_days, retries, backoff):
+    """
+    Fetches prices from overlap_days before the last stored date and appends the new rows.
+
+    The overlapping rows are compared with the stored ones first. If any close differs, the
+    history was restated (e.g. adjusted for a split or dividend), so the whole history is
+    downloaded again instead of appending to prices that no longer line up.
+    """
+    path = f"{file_path}/{code}.csv"
+    stored = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+    last_date = pd.Timestamp(last_date) if last_date else stored.index.max()
+    start = (last_date - pd.Timedelta(days=overlap_days)).strftime('%Y-%m-%d')
+    fetched = fetch_with_retry(source, code, start, retries, backoff, require_rows=False)
+    if fetched is None or len(fetched) == 0:
+        # Nothing traded since the overlap start, e.g. a suspended or delisted code
+        return 'unchanged', last_date.strftime('%Y-%m-%d')
+    fetched.index = pd.to_datetime(fetched.index)
+
+    overlap = stored.index.intersection(fetched.index)
+    stored_close = stored.loc[overlap, 'Close'].astype(float).to_numpy()
+    fetched_close = fetched.loc[overlap, 'Close'].astype(float).to_numpy()
+    if not np.allclose(stored_close, fetched_close, rtol=1e-9, atol=0, equal_nan=True):
+        return 'restated', _download_full(source, code, file_path, retries, backoff)
+
+    new_rows = fetched[fetched.index > last_date]
+    if len(new_rows) == 0:
+        return 'unchanged', last_date.strftime('%Y-%m-%d')
+    new_rows.index.name = stored.index.name
+    new_rows.reindex(columns=stored.columns).to_csv(path, mode='a', header=False)
+    return 'appended', pd.Timestamp(new_rows.index.max()).strftime('%Y-%m-%d')
+
+
+def download_prices(codes, source=None, file_path=DATA_PATH, max_workers=DOWNLOAD_MAX_WORKERS,
+                    retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF, refresh=False,
+                    overlap_days=REFRESH_OVERLAP_DAYS):
+    """
+    Downloads {code}.csv for every code that does not have one yet, several codes at a time.
+
+    With refresh, codes that already have a CSV are brought up to date as well: only the days
+    after the last stored date (plus an overlap used to detect restated histories) are
+    requested and appended. The last stored date of each code is kept in the price manifest.
+
+    Args:
+    codes (iterable): Stock codes.
+    source (PriceSource): Where prices come from; FinanceDataReader by default.
+    file_path (str): Directory of the per-code price CSVs.
+    max_workers (int): Maximum number of concurrent downloads.
+    retries (int): Retries per code after the first failed attempt.
+    backoff (float): Delay in seconds before the first retry; doubled on each further retry.
+    refresh (bool): Append the missing tail of codes that are already stored.
+    overlap_days (int): Calendar days before the last stored date to fetch again for comparison.
+
+    Returns:
+    dict: Lists of 'fetched', 'appended', 'unchanged', 'restated' and 'skipped' codes, and
+    'failed' mapping code -> error message.
+    """
+    source = FinanceDataReaderSource() if source is None else source
+    summary = {'fetched': [], 'appended': [], 'unchanged': [], 'restated': [], 'skipped': [], 'failed': {}}
+    manifest = _read_manifest(file_path)
+    tasks = {}
+    for code in codes:
+        if not os.path.exists(f"{file_path}/{code}.csv"):
+            tasks[code] = lambda code=code: ('fetched', _download_full(source, code, file_path, retries, backoff))
+        elif refresh:
+            tasks[code] = lambda code=code: _refresh_tail(source, code, file_path, manifest.get(code),
+                                                          overlap_days, retries, backoff)
+        else:
+            summary['skipped'].append(code)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(task): code for code, task in tasks.items()}
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                status, last_date = future.result()
+                summary[status].append(code)
+                count(f'prices_{status}')
+                manifest[code] = last_date
+            except Exception as e:
+                summary['failed'][code] = str(e)
+                count('prices_failed', code=code)
+
+    count('prices_skipped', len(summary['skipped']))
+    if tasks:
+        _write_manifest(file_path, manifest)
+    return summary
@@ -0,0 +1,35 @@
+from .config import DATA_PATH
+from .utils import mkdir
+from .price_panel import build_price_panel, panel_is_stale
+from .price_source import download_prices
+
+
+def get_price_data(codes, source=None, refresh=False):
+    """
+    Downloads missing price CSVs concurrently, then refreshes the price panel.
+
+    Args:
+    codes (iterable): Stock codes.
+    source (PriceSource): Price provider; FinanceDataReader by default.
+    refresh (bool): Also append the days missing from codes that are already stored.
+
+    Returns:
+    dict: Download summary (see download_prices): lists of 'fetched' (newly downloaded),
+    'appended' (refreshed with new days), 'unchanged' (refreshed, nothing new), 'restated'
+    (re-downloaded because stored days changed) and 'skipped' (already stored) codes, and
+    'failed' mapping code -> error message.
+    """
+
+    mkdir(DATA_PATH)
+
+    summary = download_prices(codes, source, refresh=refresh)
+    for code, error in summary['failed'].items():
+        print(f"Error fetching data for code {code}: {error}")
+    print(f"Fetched {len(summary['fetched'])} codes, appended to {len(summary['appended'])}, "
+          f"re-downloaded {len(summary['restated'])} restated, {len(summary['unchanged']) + len(summary['skipped'])} unchanged, "
+          f"{len(summary['failed'])} failed")
+
+    if panel_is_stale(codes):
+        build_price_panel()
+
+    return summary
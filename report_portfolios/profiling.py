@@ -0,0 +1,102 @@
+import json
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+_profiler = None
+
+
+class Profiler:
+    """
+    Records the wall time of pipeline stages and named counters, overall, per month and per code.
+
+    Only one profiler is active per process (see start_profiling); the stage and count helpers
+    below do nothing while none is active, so instrumented code costs nothing in normal runs.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = defaultdict(int)
+        self.months = defaultdict(lambda: defaultdict(int))
+        self.codes = defaultdict(lambda: defaultdict(int))
+        self.extra = {}
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, n=1, month=None, code=None):
+        self.counters[name] += n
+        if month is not None:
+            self.months[month][name] += n
+        if code is not None:
+            self.codes[code][name] += n
+
+    def report(self, top_codes=20):
+        """
+        Returns the recorded values as a JSON-serialisable dict.
+
+        Args:
+        top_codes (int): Keep only the codes with the most recorded events.
+
+        Returns:
+        dict: 'stages' (seconds), 'counters', 'months' (month -> counters, including the
+        seconds spent on it), 'codes' (code -> counters) and any values added to extra.
+        """
+        codes = sorted(self.codes.items(), key=lambda item: -sum(item[1].values()))[:top_codes]
+        return {
+            'stages': dict(self.stages),
+            'counters': dict(self.counters),
+            'months': {month: dict(counters) for month, counters in sorted(self.months.items())},
+            'codes': {code: dict(counters) for code, counters in codes},
+            **self.extra,
+        }
+
+    def write(self, path):
+        """Writes the report as JSON and logs one structured record per stage."""
+        report = self.report()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=1, default=str)
+        for name, seconds in report['stages'].items():
+            logging.info(json.dumps({'event': 'stage', 'stage': name, 'seconds': round(seconds, 6)}))
+        logging.info(f"Profile written to {path}")
+        return report
+
+
+def start_profiling():
+    """Makes a new Profiler the active one and returns it."""
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def stop_profiling():
+    global _profiler
+    _profiler = None
+
+
+def get_profiler():
+    """Returns the active Profiler, or None when profiling is off."""
+    return _profiler
+
+
+@contextmanager
+def stage(name, month=None):
+    """Times the enclosed block as a stage, also adding it to the 'seconds' of month when given."""
+    if _profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _profiler.add_stage(name, seconds)
+        if month is not None:
+            _profiler.months[month]['seconds'] += seconds
+
+
+def count(name, n=1, month=None, code=None):
+    """Adds n to a counter of the active profiler, optionally attributed to a month and a code."""
+    if _profiler is not None:
+        _profiler.count(name, n, month, code)
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+from .config import DATA_PATH
+from .price_panel import open_price_panel
+from .trading_calendar import trading_calendar
+from .utils import next_month, prev_month
+from .profiling import count, get_profiler
+
+
+def selection_weights(selections, months):
+    """
+    Builds an equal-weight month x code matrix from per-month code selections.
+
+    Args:
+    selections (dict): Month ('YYYY-MM') -> iterable of codes held during that month.
+    months (list): Months to use as rows; months missing from selections hold nothing.
+
+    Returns:
+    pd.DataFrame: 1.0 where a code is held in a month, 0.0 elsewhere.
+    """
+    codes = sorted({code for month in months for code in selections.get(month, [])})
+    weights = pd.DataFrame(0.0, index=pd.Index(months, name='month'), columns=codes)
+    for month in months:
+        held = list(set(selections.get(month, [])))
+        if held:
+            weights.loc[month, held] = 1.0
+    return weights
+
+
+def code_month_returns(close, calendar, month, cost):
+    """
+    Computes one code's daily returns during a month, as the per-code engines hold positions.
+
+    The first day's return is measured from the code's last close of the previous month and
+    has cost subtracted; later days are close-to-close returns. Month boundaries come from the
+    trading calendar, so the code's closes are sliced by row position.
+
+    Args:
+    close (np.ndarray): The code's closes on every calendar row (NaN where it did not trade).
+    calendar (TradingCalendar): Calendar of the rows of close.
+    month (str): Holding month ('YYYY-MM').
+    cost (float): Cost subtracted from the first day's return.
+
+    Returns:
+    pd.Series: Daily returns on the days the code traded, or None if it did not trade in the month.
+    Raises KeyError (the previous month) if it did not trade in the previous month.
+    """
+    start, end = calendar.bounds(month)
+    rows = start + np.flatnonzero(~np.isnan(close[start:end]))
+    if len(rows) == 0:
+        return None
+    prev_start, prev_end = calendar.bounds(prev_month(month))
+    prev_closes = close[prev_start:prev_end]
+    prev_closes = prev_closes[~np.isnan(prev_closes)]
+    if len(prev_closes) == 0:
+        raise KeyError(prev_month(month))
+
+    price_open = prev_closes[-1]  # bought at the last close of the previous month
+    closes = close[rows]
+    daily_returns = np.empty(len(rows))
+    daily_returns[0] = (closes[0] - price_open) / price_open - cost
+    daily_returns[1:] = closes[1:] / closes[:-1] - 1
+    return pd.Series(daily_returns, index=calendar.dates[rows], name='Close')
+
+
+def forward_fill(values):
+    """Carries each column's last non-NaN value down over the NaN rows below it (rows before the first value stay NaN)."""
+    valid = ~np.isnan(values)
+    last = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return np.take_along_axis(values, last, axis=0)
+
+
+def _count_skipped_codes(weights, months, codes, weight_values, eligible, panel):
+    """Counts, per month and code, held codes that have no prices or did not trade in the month or the one before."""
+    for i, j in zip(*np.nonzero((weight_values != 0) & ~eligible)):
+        count('skipped_codes', month=months[i], code=codes[j])
+    missing = [code for code in weights.columns if code not in panel]
+    if missing:
+        held = weights.reindex(index=months, columns=missing, fill_value=0.0).to_numpy() != 0
+        for i, j in zip(*np.nonzero(held)):
+            count('skipped_codes', month=months[i], code=missing[j])
+
+
+def code_daily_returns(codes, months, panel, cost):
+    """
+    Computes the daily return of every code on every trading day of the months, as positions earn them.
+
+    A code can be held in a month only if it traded both in that month and in the previous
+    one. Its return on its first trading day of the month is measured from the last close of
+    the previous month and has cost subtracted; later days are close-to-close returns against
+    its previous traded close.
+
+    Args:
+    codes (list): Codes stored in the panel.
+    months (list): Holding months, in order.
+    panel (PricePanel): Price panel to read closes from.
+    cost (float): Cost charged on each position's first-day return.
+
+    Returns:
+    tuple: Trading dates (DatetimeIndex), dates x codes returns (0 where a code is not held),
+    dates x codes mask of held codes that traded, the month position of each date and the
+    months x codes eligibility mask.
+    """
+    calendar = trading_calendar(panel)
+    starts, ends = calendar.bounds_array(months)
+    prev_starts, prev_ends = calendar.bounds_array([prev_month(m) for m in months])
+    lo = int(min(prev_starts.min(), starts.min())) if len(months) else 0
+    hi = int(ends.max()) if len(months) else 0
+
+    columns = np.array([panel.column(code) for code in codes], dtype=np.intp)
+    close = np.asarray(panel.close[lo:hi])[:, columns]
+    traded = ~np.isnan(close)
+    prev_close = np.vstack([np.full((1, len(codes)), np.nan), forward_fill(close)[:-1]])
+    returns = close / prev_close - 1
+
+    traded_count = np.vstack([np.zeros((1, len(codes)), dtype=np.int64), np.cumsum(traded, axis=0)])
+    starts, ends, prev_starts, prev_ends = starts - lo, ends - lo, prev_starts - lo, prev_ends - lo
+    eligible = ((traded_count[ends] - traded_count[starts]) > 0) & ((traded_count[prev_ends] - traded_count[prev_starts]) > 0)
+
+    rows = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(months) else np.array([], dtype=np.intp)
+    month_of_row = np.repeat(np.arange(len(months)), ends - starts)
+    first_day = traded[rows] & ((traded_count[rows + 1] - traded_count[starts[month_of_row]]) == 1)
+
+    # Ineligible codes may have no previous close in the slice; their returns must not reach the sums as NaN
+    held = traded[rows] & eligible[month_of_row]
+    row_returns = np.where(held, returns[rows] - cost * first_day, 0.0)
+    return panel.dates[lo:hi][rows], row_returns, held, month_of_row, eligible
+
+
+def leg_daily_returns(weights, months, panel, cost):
+    """
+    Computes the daily returns of one portfolio leg for every month in one pass.
+
+    Codes earn the returns of code_daily_returns. Each day's leg return is the weighted mean
+    over the held codes that traded that day, which for equal weights is the mean the per-code
+    loops compute.
+
+    Args:
+    weights (pd.DataFrame): Month x code weights (see selection_weights).
+    months (list): Holding months, in order.
+    panel (PricePanel): Price panel to read closes from.
+    cost (float): Cost charged on each position's first-day return.
+
+    Returns:
+    tuple: Trading dates (DatetimeIndex), leg returns (NaN on days no code traded) and the
+    month position of each date.
+    """
+    codes = [code for code in weights.columns if code in panel]
+    weight_values = weights.reindex(index=months, columns=codes, fill_value=0.0).to_numpy(dtype=np.float64)
+
+    dates, row_returns, held, month_of_row, eligible = code_daily_returns(codes, months, panel, cost)
+    if get_profiler() is not None:
+        _count_skipped_codes(weights, months, codes, weight_values, eligible, panel)
+
+    row_weights = np.where(held, weight_values[month_of_row], 0.0)
+    total_weight = row_weights.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        leg = np.where(total_weight != 0, (row_weights * row_returns).sum(axis=1) / total_weight, np.nan)
+
+    return dates, leg, month_of_row
+
+
+def fill_empty_legs_of_month(month, legs):
+    """
+    Combines a month's leg returns when a leg selected no codes, as calculate_returns does.
+
+    An empty leg returns 0 on every calendar day from the first of the month to the first of
+    the next month; the other leg keeps the days it has a return.
+
+    Args:
+    month (str): Holding month ('YYYY-MM').
+    legs (list): Long leg, then short leg if any: pd.Series of daily returns, or None where the leg is empty.
+
+    Returns:
+    pd.Series: Daily returns of the long leg (minus the short leg).
+    """
+    filled = []
+    for leg in legs:
+        if leg is None:
+            date_range = pd.date_range(start=month, end=next_month(month))
+            filled.append(pd.Series([0] * len(date_range), index=date_range))
+        else:
+            filled.append(leg.dropna())
+    return filled[0] - filled[1] if len(filled) == 2 else filled[0]
+
+
+def portfolio_returns(months, long_weights, short_weights=None, panel=None, long_cost=0.0, short_cost=0.0, fill_empty_legs=False):
+    """
+    Computes the long (minus short) portfolio daily returns of every month at once.
+
+    Args:
+    months (list): Holding months ('YYYY-MM'), in order.
+    long_weights (pd.DataFrame): Month x code weights of the long leg.
+    short_weights (pd.DataFrame): Month x code weights of the short leg, or None for long-only.
+    panel (PricePanel): Price panel; defaults to the panel under DATA_PATH.
+    long_cost (float): Cost on the long leg's first-day returns.
+    short_cost (float): Cost on the short leg's first-day returns.
+    fill_empty_legs (bool): Treat a leg that selected no codes as zero returns on every calendar
+        day from the first of the month to the first of the next month, as calculate_returns does.
+
+    Returns:
+    dict: Month -> pd.Series of portfolio daily returns.
+    """
+    panel = open_price_panel(DATA_PATH) if panel is None else panel
+    dates, long_leg, month_of_row = leg_daily_returns(long_weights, months, panel, long_cost)
+    if short_weights is None:
+        port, keep = long_leg, ~np.isnan(long_leg)
+    else:
+        _, short_leg, _ = leg_daily_returns(short_weights, months, panel, short_cost)
+        port, keep = long_leg - short_leg, ~(np.isnan(long_leg) & np.isnan(short_leg))
+
+    long_empty = long_weights.reindex(index=months, fill_value=0.0).abs().sum(axis=1).to_numpy() == 0
+    short_empty = (short_weights.reindex(index=months, fill_value=0.0).abs().sum(axis=1).to_numpy() == 0
+                   if short_weights is not None else np.zeros(len(months), dtype=bool))
+
+    port_daily_returns = {}
+    bounds = np.searchsorted(month_of_row, np.arange(len(months) + 1))
+    for i, month in enumerate(months):
+        rows = slice(bounds[i], bounds[i + 1])
+        if fill_empty_legs and (long_empty[i] or short_empty[i]):
+            legs = [None if long_empty[i] else pd.Series(long_leg[rows], index=dates[rows])]
+            if short_weights is not None:
+                legs.append(None if short_empty[i] else pd.Series(short_leg[rows], index=dates[rows]))
+            port_daily_returns[month] = fill_empty_legs_of_month(month, legs)
+        else:
+            mask = keep[rows]
+            port_daily_returns[month] = pd.Series(port[rows][mask], index=dates[rows][mask])
+    return port_daily_returns
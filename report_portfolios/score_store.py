@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from .config import SCORE_CACHE_DIR
+from .utils import mkdir
+from .profiling import count
+
+# Bump when the layout of the cached arrays changes so older caches are rebuilt
+CACHE_VERSION = 1
+
+
+def read_score_csv(dataset_path):
+    """Parses a score CSV into a date-indexed frame with the leading quote stripped from 'code'."""
+    df = pd.read_csv(dataset_path, index_col=0)
+    df.index = pd.to_datetime(df.index)
+    df['code'] = df['code'].str.replace("'", "")
+    return df
+
+
+def _cache_files(dataset_path):
+    directory, file_name = os.path.split(os.path.abspath(dataset_path))
+    name = os.path.splitext(file_name)[0]
+    cache_path = os.path.join(directory, SCORE_CACHE_DIR)
+    return cache_path, os.path.join(cache_path, f'{name}.npz'), os.path.join(cache_path, f'{name}.json')
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _narrowest(values, candidates):
+    """Returns values cast to the first candidate dtype that converts back to them exactly."""
+    for dtype in candidates:
+        narrowed = values.astype(dtype)
+        if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=values.dtype.kind == 'f'):
+            return narrowed
+    return values
+
+
+def _encode(df):
+    """
+    Splits a score frame into compact arrays and a description of how to rebuild it.
+
+    Dates become int32 day numbers, text columns int32 positions into their distinct values, and
+    numeric columns the narrowest dtype that holds every value exactly (float32 scores, int8
+    ratings), so the rebuilt frame is identical to the parsed one. Returns None for frames with
+    columns that cannot be stored this way.
+    """
+    arrays, columns = {}, []
+    index = df.index
+    if not index.hasnans and (index == index.normalize()).all():
+        arrays['index'] = index.values.astype('datetime64[D]').astype(np.int32)
+        index_unit = 'D'
+    else:
+        arrays['index'] = index.values.astype('datetime64[ns]').view(np.int64)
+        index_unit = 'ns'
+
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        if values.dtype.kind == 'f':
+            arrays[f'c{i}'] = _narrowest(values.to_numpy(), [np.float32])
+        elif values.dtype.kind in 'iu':
+            arrays[f'c{i}'] = _narrowest(values.to_numpy(), [np.int8, np.int16, np.int32])
+        elif values.dtype.kind == 'b':
+            arrays[f'c{i}'] = values.to_numpy()
+        else:
+            codes, uniques = pd.factorize(values)
+            if not all(isinstance(value, str) for value in uniques):
+                return None
+            arrays[f'c{i}'] = codes.astype(np.int32)
+            arrays[f'c{i}_values'] = np.array(list(uniques), dtype=str)
+        columns.append({'name': column, 'dtype': str(values.dtype), 'text': f'c{i}_values' in arrays})
+
+    layout = {'index_name': index.name, 'index_dtype': str(index.dtype), 'index_unit': index_unit, 'columns': columns}
+    return arrays, layout
+
+
+def _decode(arrays, layout):
+    """Rebuilds the frame described by _encode."""
+    if layout['index_unit'] == 'D':
+        dates = arrays['index'].astype('datetime64[D]')
+    else:
+        dates = arrays['index'].view('datetime64[ns]')
+    # numpy converts units far faster than DatetimeIndex.astype
+    index = pd.DatetimeIndex(dates.astype(layout['index_dtype']))
+    index.name = layout['index_name']
+
+    data = {}
+    for i, column in enumerate(layout['columns']):
+        values = arrays[f'c{i}']
+        if column['text']:
+            distinct = arrays[f'c{i}_values'].astype(object)
+            text = distinct[values] if len(distinct) else np.full(len(values), np.nan, dtype=object)
+            text[values < 0] = np.nan
+            data[column['name']] = pd.Series(text, index=index, dtype=column['dtype'])
+        else:
+            data[column['name']] = pd.Series(values, index=index).astype(column['dtype'])
+    return pd.DataFrame(data, index=index)
+
+
+def _write_cache(dataset_path, df, fingerprint):
+    cache_path, arrays_path, meta_path = _cache_files(dataset_path)
+    encoded = _encode(df)
+    if encoded is None:
+        logging.info(f"Scores in {dataset_path} cannot be cached in binary form; reading the CSV each run")
+        return
+    arrays, layout = encoded
+    if not os.path.isdir(cache_path):
+        mkdir(cache_path)
+    try:
+        # The metadata is removed first and written last, so arrays that do not match it are never read
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        with open(arrays_path + '.tmp', 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(arrays_path + '.tmp', arrays_path)
+        _write_meta(meta_path, {'version': CACHE_VERSION, **fingerprint, 'layout': layout})
+    except OSError as e:
+        logging.warning(f"Could not write the score cache for {dataset_path}: {e}")
+
+
+def _write_meta(meta_path, meta):
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_scores(dataset_path):
+    """
+    Loads a score CSV through a binary cache kept in {score directory}/{SCORE_CACHE_DIR}.
+
+    The CSV is parsed once and stored as typed arrays; later loads read those arrays instead. The
+    cache is used while the CSV's size and modification time match the ones recorded with it. A
+    CSV that was touched but has the same content (same SHA-1) keeps its cache.
+
+    Args:
+    dataset_path (str): Path of the score CSV.
+
+    Returns:
+    DataFrame: The same frame as read_score_csv(dataset_path).
+    """
+    stat = os.stat(dataset_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    _, arrays_path, meta_path = _cache_files(dataset_path)
+    meta = _read_meta(meta_path)
+
+    if meta is not None and meta.get('version') == CACHE_VERSION and meta['size'] == stat.st_size:
+        fresh = meta['mtime_ns'] == stat.st_mtime_ns
+        if not fresh and _file_hash(dataset_path) == meta['sha1']:
+            meta['mtime_ns'] = stat.st_mtime_ns
+            try:
+                _write_meta(meta_path, meta)
+            except OSError:
+                pass
+            fresh = True
+        if fresh:
+            try:
+                with np.load(arrays_path) as arrays:
+                    df = _decode(arrays, meta['layout'])
+                count('score_cache_hits')
+                return df
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Ignoring unreadable score cache {arrays_path}: {e}")
+
+    count('score_cache_misses')
+    df = read_score_csv(dataset_path)
+    _write_cache(dataset_path, df, {**fingerprint, 'sha1': _file_hash(dataset_path)})
+    return df
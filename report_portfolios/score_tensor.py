@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from .utils import month_id
+
+
+def default_score_column(df):
+    """Returns the score column of a score frame: 'pos_score' for sentiment scores, 'score' for analyst ratings."""
+    for column in ('pos_score', 'score'):
+        if column in df.columns:
+            return column
+    raise ValueError(f"No score column in {list(df.columns)}")
+
+
+class ScoreTensor:
+    """
+    Monthly scores of several score sources aligned into one month x code x source array.
+
+    Reports on the same code within a month are averaged per source, as MonthlyScores does for
+    one source, and 'counts' keeps how many report rows each mean stands for (0 where a source
+    has no report on the code that month, where the score is NaN).
+    """
+
+    def __init__(self, months, codes, sources, values, counts):
+        self.months = list(months)
+        self.codes = list(codes)
+        self.sources = list(sources)
+        self.values = values
+        self.counts = counts
+
+    @classmethod
+    def from_frames(cls, frames, months, columns=None):
+        """
+        Aligns several score frames.
+
+        Args:
+        frames (dict): Source name -> date-indexed scores with a 'code' column.
+        months (list): Months ('YYYY-MM') to align on; reports in other months are left out.
+        columns (dict): Source name -> score column; defaults to default_score_column.
+
+        Returns:
+        ScoreTensor: Scores of every code reported on by any source.
+        """
+        columns = columns or {}
+        first = month_id(months[0]) if months else 0
+        parts = []
+        for i, (name, df) in enumerate(frames.items()):
+            column = columns.get(name) or default_score_column(df)
+            index = pd.DatetimeIndex(df.index)
+            parts.append(pd.DataFrame({'month': (index.year * 12 + index.month - 1 - first).to_numpy(),
+                                       'code': df['code'].to_numpy(), 'source': i,
+                                       'score': df[column].to_numpy(dtype=np.float64)}))
+        reports = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['month', 'code', 'source', 'score'])
+        reports = reports[(reports['month'] >= 0) & (reports['month'] < len(months)) & reports['score'].notna()]
+
+        grouped = reports.groupby(['month', 'code', 'source'], sort=True)['score'].agg(['mean', 'size']).reset_index()
+        code_position, codes = pd.factorize(grouped['code'], sort=True)
+        values = np.full((len(months), len(codes), len(frames)), np.nan)
+        counts = np.zeros((len(months), len(codes), len(frames)), dtype=np.int64)
+        at = (grouped['month'].to_numpy(dtype=np.intp), code_position, grouped['source'].to_numpy(dtype=np.intp))
+        values[at] = grouped['mean'].to_numpy()
+        counts[at] = grouped['size'].to_numpy()
+        return cls(months, codes.tolist(), frames.keys(), values, counts)
+
+    def source(self, name):
+        """Returns the position of a source along the last axis."""
+        return self.sources.index(name)
+
+    def with_changes(self, names):
+        """
+        Returns a tensor in which the named sources hold their month-over-month score change.
+
+        A change needs reports on the code in both months and stands for the product of both
+        months' report counts, as the incremental sentiment strategies count it. Differences are
+        absolute, so a rating upgrade from 3 to 4 is +1.
+        """
+        values, counts = self.values.copy(), self.counts.copy()
+        for name in names:
+            i = self.source(name)
+            values[:, :, i] = np.nan
+            values[1:, :, i] = self.values[1:, :, i] - self.values[:-1, :, i]
+            counts[:, :, i] = 0
+            counts[1:, :, i] = self.counts[1:, :, i] * self.counts[:-1, :, i]
+            values[:, :, i][counts[:, :, i] == 0] = np.nan
+        return ScoreTensor(self.months, self.codes, self.sources, values, counts)
+
+
+def weighted_quantiles(values, counts, q):
+    """
+    Returns, for each row, the q quantile of the row's values each repeated counts times.
+
+    This is what codes_at_or_above computes month by month (np.quantile of the report rows,
+    linear interpolation), done for every row at once. NaN values and zero counts are skipped;
+    rows without any value get NaN.
+
+    Args:
+    values (np.ndarray): Rows x codes values.
+    counts (np.ndarray): Rows x codes report counts.
+    q (float): Quantile between 0 and 1.
+
+    Returns:
+    np.ndarray: One quantile per row.
+    """
+    counts = np.where(np.isnan(values), 0, counts)
+    order = np.argsort(np.where(counts > 0, values, np.inf), axis=1, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    cumulative = np.cumsum(np.take_along_axis(counts, order, axis=1), axis=1)
+    total = cumulative[:, -1] if values.shape[1] else np.zeros(len(values), dtype=np.int64)
+
+    # np.quantile's virtual index and interpolation, written out so the thresholds match it bit for bit
+    position = (total - 1) * q
+    below = np.floor(position)
+    fraction = position - below
+    # The repeated row's k-th value is the first sorted value whose cumulative count exceeds k
+    lower = np.minimum((cumulative <= below[:, None]).sum(axis=1), values.shape[1] - 1)
+    upper = np.minimum((cumulative <= np.minimum(below + 1, total - 1)[:, None]).sum(axis=1), values.shape[1] - 1)
+    rows = np.arange(len(values))
+    a, b = sorted_values[rows, lower], sorted_values[rows, upper]
+    with np.errstate(invalid='ignore'):
+        difference = b - a
+        quantiles = np.where(fraction >= 0.5, b - difference * (1 - fraction), a + difference * fraction)
+    return np.where(total > 0, quantiles, np.nan)
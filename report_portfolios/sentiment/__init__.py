@@ -0,0 +1,3 @@
+"""Portfolios built from sentiment scores (GPT-3.5, KoBERT, KR-FinBERT) of analyst reports."""
+
+STRATEGIES = ['incremental_long_short', 'incremental_long_only', 'static_long_short', 'static_long_only']
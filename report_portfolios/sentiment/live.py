@@ -0,0 +1,115 @@
+import argparse
+import logging
+from . import STRATEGIES
+from ..config import DEFAULT_START_DATE, DEFAULT_TRANSACTION_COST, FIRST_MONTH, LIVE_STATE_PATH
+from ..live_state import state_file, load_state, save_state
+from ..utils import month_range, next_month, prev_month
+from .main import load_dataset
+
+logging.basicConfig(level=logging.INFO)
+
+
+def month_digests(df):
+    """Returns month -> order-independent hash of that month's score rows."""
+    import pandas as pd
+    hashed = pd.util.hash_pandas_object(df, index=True)
+    return {month: int(digest) for month, digest in hashed.groupby(df.index.strftime('%Y-%m')).sum().items()}
+
+
+def update_backtest(dataset_name, strategy_name, df, transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8,
+                    state_dir=LIVE_STATE_PATH, source=None, refresh_prices=True):
+    """
+    Extends the persisted backtest of a strategy with new score rows and new prices.
+
+    The state keeps each month's holdings and daily returns, the score digest of each month
+    and the last price date seen. Codes are selected again only for months whose scores (or,
+    as the incremental strategies compare with it, the previous month's scores) changed, and
+    returns are recomputed only for new months, months whose holdings changed, months from
+    the last price date onwards and months holding a code whose history was restated.
+
+    Args:
+    dataset_name (str): Name of the score dataset.
+    strategy_name (str): One of STRATEGIES.
+    df (pd.DataFrame): Date-indexed scores, including the new rows.
+    transaction_cost (float): See strategy.run_strategy; changing it starts a new backtest.
+    quantile (float): See strategy.run_strategy; changing it starts a new backtest.
+    state_dir (str): Directory of the persisted states.
+    source (PriceSource): Price provider for get_price_data.
+    refresh_prices (bool): Append the latest prices of stored codes before updating.
+
+    Returns:
+    tuple: Daily portfolio returns of the whole backtest (pd.Series) and the recomputed months.
+    """
+    import pandas as pd
+    from . import strategy
+    from ..price_panel import open_price_panel
+    path = state_file(dataset_name, strategy_name, state_dir)
+    params = {'dataset_name': dataset_name, 'strategy_name': strategy_name,
+              'transaction_cost': transaction_cost, 'quantile': quantile}
+    state = load_state(path)
+    if state is None or state['params'] != params:
+        state = {'params': params, 'score_digests': {}, 'price_end': None, 'last_month': None,
+                 'long_codes': {}, 'short_codes': {}, 'returns': {}}
+
+    summary = strategy.get_price_data(df['code'].unique(), source, refresh_prices)
+    price_end = open_price_panel().dates[-1]
+    months = month_range(FIRST_MONTH, next_month(price_end.strftime('%Y-%m')))[1:]
+
+    digests = month_digests(df)
+    changed_scores = {month for month in set(digests) | set(state['score_digests'])
+                      if digests.get(month) != state['score_digests'].get(month)}
+    candidates = sorted(month for month in months if month not in state['returns']
+                        or month in changed_scores or prev_month(month) in changed_scores)
+    long_codes, short_codes = strategy.select_codes(strategy_name, dataset_name, candidates, df, quantile)
+
+    first_price_month = state['price_end'][:7] if state['price_end'] else FIRST_MONTH
+    restated = set(summary['restated'])
+    recompute = []
+    for month in months:
+        if month in long_codes:
+            changed = (set(long_codes[month]) != set(state['long_codes'].get(month, []))
+                       or (short_codes is not None and set(short_codes[month]) != set(state['short_codes'].get(month, []))))
+            state['long_codes'][month] = long_codes[month]
+            if short_codes is not None:
+                state['short_codes'][month] = short_codes[month]
+        else:
+            changed = False
+        held = set(state['long_codes'][month]) | set(state['short_codes'].get(month, []))
+        if month not in state['returns'] or changed or month >= first_price_month or held & restated:
+            recompute.append(month)
+
+    if recompute:
+        state['returns'].update(strategy.monthly_portfolio_returns(
+            recompute, state['long_codes'], state['short_codes'] if short_codes is not None else None,
+            'matrix', transaction_cost))
+
+    state['score_digests'] = digests
+    state['price_end'] = price_end.strftime('%Y-%m-%d')
+    state['last_month'] = months[-1]
+    save_state(state, path)
+
+    port_daily_returns = pd.concat([state['returns'][month] for month in months]).sort_index()
+    return port_daily_returns, recompute
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Extend a persisted backtest with new scores and prices.')
+    parser.add_argument('--dataset_name', required=True, help='Name of the dataset (excluding .csv)')
+    parser.add_argument('--strategy_name', required=True, choices=STRATEGIES, help='strategy to use')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='Transaction cost to be considered')
+    parser.add_argument('--quantile', type=float, default=0.8, help='Buy scores at or above this quantile (long-short strategies short those at or below 1 - quantile)')
+    parser.add_argument('--state_dir', default=LIVE_STATE_PATH, help='Directory of the persisted backtest states')
+    parser.add_argument('--no_refresh', action='store_true', help='Do not fetch the latest prices of stored codes')
+
+    args = parser.parse_args(argv)
+    from ..evaluation import fetch_kospi_data, evaluate_portfolio
+    df = load_dataset(args.dataset_name, DEFAULT_START_DATE, None)
+    port_daily_returns, recomputed = update_backtest(args.dataset_name, args.strategy_name, df, args.transaction_cost,
+                                                     args.quantile, args.state_dir, refresh_prices=not args.no_refresh)
+    logging.info(f"Recomputed {len(recomputed)} months: {', '.join(recomputed)}")
+    kospi_daily_returns = fetch_kospi_data(DEFAULT_START_DATE, port_daily_returns.index[-1].strftime('%Y-%m-%d'))
+    evaluate_portfolio(port_daily_returns, kospi_daily_returns, args.dataset_name)
+
+
+if __name__ == "__main__":
+    cli()
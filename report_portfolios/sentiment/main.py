@@ -0,0 +1,144 @@
+import logging
+import argparse 
+from . import STRATEGIES
+from ..config import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_TRANSACTION_COST, DATA_PATH, PRICE_CACHE_MAX_BYTES, FIRST_MONTH, END_MONTH, CHECKPOINT_PATH
+from ..profiling import start_profiling, stage
+
+logging.basicConfig(level=logging.INFO)
+
+def load_dataset(dataset_name, start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE):
+    """Loads ./score/{dataset_name}.csv as a date-indexed frame with the quote stripped from 'code' (end_date None keeps every later row)."""
+    from ..score_store import load_scores
+    dataset_path = f'./score/{dataset_name}.csv'
+    logging.info(f"Loading dataset from {dataset_path}")
+    df = load_scores(dataset_path)
+    df = df[df.index >= start_date]
+    if end_date is not None:
+        df = df[df.index <= end_date]
+    return df
+
+
+def main(args):
+    import pandas as pd
+    from . import strategy
+    from ..evaluation import fetch_kospi_data, evaluate_portfolio, evaluate_portfolio_stream
+    from ..utils import month_range
+    from ..price_cache import get_price_cache
+    from ..price_source import DirectorySource
+    from ..significance import random_portfolio_test, write_daily_returns
+    from ..position_ledger import PositionLedger
+    from ..checkpoint import Checkpoint, score_fingerprint, price_version
+
+    profiler = start_profiling() if args.profile else None
+
+    with stage('load_scores'):
+        df = load_dataset(args.dataset_name, args.start_date, args.end_date)
+    codes = df['code'].unique()
+
+    
+    print("Fetching price data for the stock codes...")
+    # Fetch price data
+    with stage('fetch_prices'):
+        strategy.get_price_data(codes, DirectorySource(args.price_source_dir) if args.price_source_dir else None, args.refresh_prices)
+
+    price_cache = get_price_cache(DATA_PATH, args.price_cache_mb * 1024 ** 2)
+
+    months = month_range(FIRST_MONTH, END_MONTH)
+
+    # The first month only provides scores; codes are held from the second month on
+    try:
+        with stage('build_signals'):
+            long_codes, short_codes = strategy.select_codes(args.strategy_name, args.dataset_name, months[1:], df, args.quantile)
+    except ValueError as e:
+        logging.error(str(e))
+        return
+
+    checkpoint = None
+    if args.checkpoint:
+        params = dict(package='sentiment', dataset=args.dataset_name, strategy=args.strategy_name, quantile=args.quantile,
+                      transaction_cost=args.transaction_cost, cost_model=args.cost_model, engine=args.engine)
+        checkpoint = Checkpoint(score_fingerprint(df), params, price_version(), args.checkpoint)
+    if args.stream:
+        with stage('evaluation'):
+            kospi_daily_returns = fetch_kospi_data(args.start_date, args.end_date)
+        # Each month's returns are evaluated as soon as they are computed and then dropped
+        with stage('returns'):
+            monthly_returns = strategy.iter_monthly_portfolio_returns(months[1:], long_codes, short_codes, args.engine, args.transaction_cost,
+                                                                      cost_model=args.cost_model, checkpoint=checkpoint,
+                                                                      workers=args.month_workers or None)
+            evaluation_results = evaluate_portfolio_stream((returns for _, returns in monthly_returns), kospi_daily_returns, args.dataset_name)
+        logging.info(f"Price cache: {price_cache.stats()}")
+    else:
+        with stage('returns'):
+            result = strategy.monthly_portfolio_returns(months[1:], long_codes, short_codes, args.engine, args.transaction_cost, args.cost_model,
+                                                        checkpoint, args.month_workers or None)
+
+        logging.info(f"Price cache: {price_cache.stats()}")
+        logging.info("Evaluating the portfolio against KOSPI")
+        port_daily_returns = result
+        combined_port_daily_returns = pd.concat(port_daily_returns.values()).sort_index()
+
+        with stage('evaluation'):
+            # Fetch KOSPI data
+            kospi_daily_returns = fetch_kospi_data(args.start_date, args.end_date)
+
+            # Evaluate the portfolio against KOSPI
+            evaluation_results = evaluate_portfolio(combined_port_daily_returns, kospi_daily_returns, args.dataset_name)
+        if args.save_returns:
+            write_daily_returns(combined_port_daily_returns, args.save_returns)
+
+    if args.ledger:
+        ledger = PositionLedger.from_selections(months[1:], long_codes, short_codes)
+        ledger.summary(args.transaction_cost).to_csv(args.ledger)
+
+    if args.random_portfolios:
+        with stage('random_portfolios'):
+            table = random_portfolio_test({'annualized_return': evaluation_results['port_annualized_return'],
+                                           'sharpe_ratio': evaluation_results['sharpe_ratio_port']},
+                                          months[1:], long_codes, short_codes, universe=codes,
+                                          long_cost=args.transaction_cost, short_cost=2 * args.transaction_cost,
+                                          n_replications=args.random_portfolios, seed=args.seed, max_workers=args.workers)
+        print(f"\n{args.dataset_name} against {args.random_portfolios} random portfolios")
+        print(table.to_string())
+
+    if profiler is not None:
+        profiler.extra['price_cache'] = price_cache.stats()
+        profiler.write(args.profile)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run stock strategies with different parameters.')
+    parser.add_argument('--dataset_name', required=True, help='Name of the dataset (excluding .csv)')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='Transaction cost to be considered')
+    parser.add_argument('--cost_model', default='flat', choices=['flat', 'turnover'], help='Charge costs on every position every month (flat) or per unit of weight traded (turnover)')
+    parser.add_argument('--ledger', default=None, help='Write the monthly names, turnover, exposures and cost drag of the holdings to this CSV')
+    parser.add_argument('--strategy_name', required=True, help=f"strategy to use ({', '.join(STRATEGIES)})")
+    parser.add_argument('--quantile', type=float, default=0.8, help='Buy scores at or above this quantile (long-short strategies short those at or below 1 - quantile)')
+    parser.add_argument('--start_date', type=str, default=DEFAULT_START_DATE, help="Start date for portfolio evaluation and KOSPI data")
+    parser.add_argument('--end_date', type=str, default=DEFAULT_END_DATE, help="End date for portfolio evaluation and KOSPI data")
+    parser.add_argument('--price_cache_mb', type=int, default=PRICE_CACHE_MAX_BYTES // 1024 ** 2, help='Memory budget of the in-process price cache in MB')
+    parser.add_argument('--engine', default='matrix', choices=['matrix', 'per_code'], help='Compute returns for all months at once (matrix) or code by code (per_code)')
+    parser.add_argument('--price_source_dir', default=None, help='Copy missing prices from {code}.csv files in this directory instead of downloading them')
+    parser.add_argument('--refresh_prices', action='store_true', help='Append the latest prices to codes that are already stored')
+    parser.add_argument('--stream', action='store_true', help='Compute and evaluate the returns month by month instead of holding every month in memory')
+    parser.add_argument('--save_returns', default=None, help='Write the daily portfolio returns to this CSV (input of significance.py)')
+    parser.add_argument('--random_portfolios', type=int, default=0, help='Compare the strategy with this many portfolios of randomly drawn codes')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random portfolios')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for the random portfolios (default: number of CPUs)')
+    parser.add_argument('--month_workers', type=int, default=1, help='Processes computing months in parallel (0: number of CPUs)')
+    parser.add_argument('--checkpoint', nargs='?', const=CHECKPOINT_PATH, default=None,
+                        help=f'Store completed months in this directory and resume from them on the next identical run (default: {CHECKPOINT_PATH})')
+    parser.add_argument('--profile', nargs='?', const='./profile.json', default=None, help='Write per-stage wall times and counters to this JSON file (default: ./profile.json)')
+    return parser
+
+
+def cli(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.stream and args.save_returns:
+        parser.error("--save_returns needs every month's returns; drop --stream")
+    main(args)
+
+
+if __name__ == "__main__":
+    cli()
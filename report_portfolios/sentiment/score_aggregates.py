@@ -0,0 +1,83 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from ..utils import next_month
+
+SCORE_COLUMNS = ['pos_score', 'neg_score']
+
+# Aggregates of the most recently used score frames; older ones (e.g. of a reloaded score file) are dropped
+AGGREGATE_CACHE_SIZE = 8
+
+_aggregate_cache = OrderedDict()
+
+
+class MonthlyScores:
+    """
+    Per-(month, code) score aggregates shared by all sentiment strategies.
+
+    Reports on the same code within a month are averaged, and 'n' keeps how many report rows
+    each mean stands for. The strategies take their quantiles over report rows, not codes, so
+    a code with several reports weighs more; repeating each mean n times reproduces that.
+    """
+
+    def __init__(self, df):
+        self.columns = [column for column in SCORE_COLUMNS if column in df.columns]
+        reports = df[['code'] + self.columns].copy()
+        reports['month'] = df.index.strftime('%Y-%m')
+        grouped = reports.groupby(['month', 'code'], sort=True)
+        table = grouped[self.columns].mean()
+        table['n'] = grouped.size()
+        self.table = table.reset_index()
+
+        # A code's change from one month to the next counts once per pair of reports, as the
+        # inner merge of the two months' reports does
+        prev = self.table.rename(columns={column: f'prev_{column}' for column in self.columns + ['n']})
+        prev['month'] = prev['month'].map({month: next_month(month) for month in prev['month'].unique()})
+        changes = self.table.merge(prev, on=['month', 'code'], how='inner')
+        for column in self.columns:
+            change = column.replace('_score', '_change')
+            changes[change] = (changes[column] - changes[f'prev_{column}']) / changes[f'prev_{column}']
+        changes['n'] = changes['n'] * changes['prev_n']
+        self.changes = changes.drop(columns=['prev_n'])
+
+        self._months = dict(tuple(self.table.groupby('month', sort=False)))
+        self._changes = dict(tuple(self.changes.groupby('month', sort=False)))
+
+    def month(self, month):
+        """Returns the code, mean scores and n of every code reported on in a month."""
+        return self._months.get(month, self.table.iloc[:0])
+
+    def changes_in(self, month):
+        """Returns the score changes from the previous month of codes reported on in both months."""
+        return self._changes.get(month, self.changes.iloc[:0])
+
+
+def monthly_scores(df):
+    """Returns the MonthlyScores of df, building them once per process for identical scores (the last AGGREGATE_CACHE_SIZE frames are kept)."""
+    columns = ['code'] + [column for column in SCORE_COLUMNS if column in df.columns]
+    key = (len(df), tuple(columns), int(pd.util.hash_pandas_object(df[columns], index=True).sum()))
+    if key in _aggregate_cache:
+        _aggregate_cache.move_to_end(key)
+    else:
+        _aggregate_cache[key] = MonthlyScores(df)
+        while len(_aggregate_cache) > AGGREGATE_CACHE_SIZE:
+            _aggregate_cache.popitem(last=False)
+    return _aggregate_cache[key]
+
+
+def codes_at_or_above(rows, column, q):
+    """Returns the codes whose value is at or above the q quantile of the report-weighted values."""
+    values = rows[column].to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return []
+    threshold = np.quantile(np.repeat(values, rows['n'].to_numpy()), q)
+    return rows['code'][values >= threshold].tolist()
+
+
+def codes_at_or_below(rows, column, q):
+    """Returns the codes whose value is at or below the q quantile of the report-weighted values."""
+    values = rows[column].to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return []
+    threshold = np.quantile(np.repeat(values, rows['n'].to_numpy()), q)
+    return rows['code'][values <= threshold].tolist()
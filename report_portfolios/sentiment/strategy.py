@@ -0,0 +1,284 @@
+import pandas as pd
+import warnings
+from ..config import DATA_PATH, DEFAULT_TRANSACTION_COST
+from ..utils import prev_month, next_month, progress
+from ..prices import get_price_data
+from ..price_panel import open_price_panel
+from ..price_cache import get_price_cache
+from ..return_engine import code_month_returns, portfolio_returns, selection_weights
+from ..position_ledger import PositionLedger, charge_cost_drag
+from ..month_scheduler import month_chunks, selections_in, run_month_tasks
+from ..trading_calendar import trading_calendar
+from ..profiling import count, stage
+from .score_aggregates import monthly_scores, codes_at_or_above, codes_at_or_below
+
+warnings.filterwarnings('ignore')
+
+
+def calculate_returns(codes, returns_dict, j, s, file_path=DATA_PATH, is_short=False, transaction_cost=DEFAULT_TRANSACTION_COST):
+
+    if len(codes) == 0: 
+        date_range = pd.date_range(start=j, end=next_month(j)) 
+        returns_dict["empty"] = pd.Series([0]*len(date_range), index=date_range)
+    else:
+        price_cache = get_price_cache(file_path)
+        calendar = trading_calendar(open_price_panel(file_path))
+        for code in codes:
+            try:
+                # bought at the last close of month s; the first day return includes the transaction cost
+                daily_pct_return = code_month_returns(price_cache.get_close(code), calendar, j,
+                                                      2 * transaction_cost if is_short else transaction_cost)
+                if daily_pct_return is None:
+                    raise KeyError(j)
+                returns_dict[code] = daily_pct_return  # save the daily return for the stock
+            except Exception as e:
+                print(f"Error with code {code}: {e}")
+                count('exceptions', month=j, code=code)
+                continue
+
+
+def monthly_portfolio_returns(months, long_codes, short_codes=None, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, cost_model='flat',
+                              checkpoint=None, workers=1):
+    """
+    Computes the long (minus short) portfolio daily returns of each month from the codes selected for it.
+
+    Args:
+    months (list): Holding months ('YYYY-MM').
+    long_codes (dict): Month -> codes bought at the close of the previous month.
+    short_codes (dict): Month -> codes sold short, or None for long-only portfolios.
+    engine (str): 'matrix' computes every month in one pass with return_engine;
+        'per_code' runs calculate_returns code by code, month by month.
+    transaction_cost (float): Cost charged on entering a long position; short positions pay twice this.
+    cost_model (str): 'flat' charges transaction_cost on every position every month; 'turnover'
+        charges it per unit of weight traded (see position_ledger.PositionLedger.turnover).
+    checkpoint (Checkpoint): Store completed months here and only compute the months it lacks.
+    workers (int): Processes computing months in parallel (None: number of CPUs; 1 computes them in this process).
+
+    Returns:
+    dict: Month -> pd.Series of portfolio daily returns.
+    """
+    return dict(iter_monthly_portfolio_returns(months, long_codes, short_codes, engine, transaction_cost, chunk_months=None, cost_model=cost_model,
+                                               checkpoint=checkpoint, workers=workers))
+
+
+def iter_monthly_portfolio_returns(months, long_codes, short_codes=None, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, chunk_months=12,
+                                   cost_model='flat', checkpoint=None, workers=1):
+    """
+    Yields (month, portfolio daily returns) in month order, as monthly_portfolio_returns computes them.
+
+    Only the months being computed are held in memory: the matrix engine runs chunk_months
+    months per pass and the per_code engine one month at a time. Every month is computed
+    independently, so chunk_months changes the returns by floating-point rounding at most.
+
+    Args:
+    months (list): Holding months ('YYYY-MM').
+    long_codes (dict): Month -> codes bought at the close of the previous month.
+    short_codes (dict): Month -> codes sold short, or None for long-only portfolios.
+    engine (str): 'matrix' or 'per_code', see monthly_portfolio_returns.
+    transaction_cost (float): Cost charged on entering a long position; short positions pay twice this.
+    chunk_months (int): Months per pass of the matrix engine; None computes all months in one pass.
+    cost_model (str): 'flat' or 'turnover', see monthly_portfolio_returns.
+    checkpoint (Checkpoint): Store completed months here and only compute the months it lacks.
+    workers (int): Processes computing months in parallel, see monthly_portfolio_returns.
+
+    Yields:
+    tuple: Month and its pd.Series of portfolio daily returns.
+    """
+    if cost_model == 'turnover':
+        # Returns are computed without costs; each month's rebalancing cost comes off its first day
+        ledger = PositionLedger.from_selections(months, long_codes, short_codes)
+        yield from charge_cost_drag(iter_monthly_portfolio_returns(months, long_codes, short_codes, engine, 0.0, chunk_months,
+                                                                   checkpoint=checkpoint, workers=workers),
+                                    ledger, transaction_cost)
+        return
+    if cost_model != 'flat':
+        raise ValueError(f"Cost model {cost_model} is not recognized.")
+    if checkpoint is not None:
+        # Months are computed independently, so the missing ones can be computed on their own; they
+        # are computed in chunks even when one pass was asked for, so a run that dies keeps its finished chunks
+        yield from checkpoint.resume(months, lambda missing: iter_monthly_portfolio_returns(missing, long_codes, short_codes, engine,
+                                                                                            transaction_cost, chunk_months or 12, workers=workers))
+        return
+    if workers != 1 and len(months) > 1:
+        # Workers get the matrix engine's chunks (one month each for per_code) and their returns
+        # are merged in month order, so the result is the serial one
+        chunk_months = (chunk_months or 12) if engine == 'matrix' else 1
+        tasks = [(iter_monthly_portfolio_returns, (chunk, selections_in(long_codes, chunk), selections_in(short_codes, chunk), engine,
+                                                   transaction_cost, chunk_months))
+                 for chunk in month_chunks(months, chunk_months)]
+        yield from run_month_tasks(tasks, workers)
+        return
+    if engine == 'matrix':
+        chunk_months = chunk_months or max(len(months), 1)
+        for i in range(0, len(months), chunk_months):
+            chunk = months[i:i + chunk_months]
+            yield from portfolio_returns(chunk,
+                                         selection_weights(long_codes, chunk),
+                                         selection_weights(short_codes, chunk) if short_codes is not None else None,
+                                         open_price_panel(DATA_PATH),
+                                         long_cost=transaction_cost,
+                                         short_cost=2 * transaction_cost,
+                                         fill_empty_legs=True).items()
+        return
+
+    for j in progress(months):
+        with stage('month_returns', month=j):
+            s = prev_month(j)
+            long_daily_returns = {}
+            calculate_returns(long_codes.get(j, []), long_daily_returns, j, s, DATA_PATH, False, transaction_cost)
+            portfolio_daily_returns = pd.DataFrame(long_daily_returns).mean(axis=1)
+            if short_codes is not None:
+                short_daily_returns = {}
+                calculate_returns(short_codes.get(j, []), short_daily_returns, j, s, DATA_PATH, True, transaction_cost)
+                portfolio_daily_returns = portfolio_daily_returns - pd.DataFrame(short_daily_returns).mean(axis=1)
+        yield j, portfolio_daily_returns
+
+
+def incremental_long_short_selection(dataset_name, months, df, quantile=0.8):
+    """Selects, for each holding month, the codes whose score rose the most (long) and the least (short) from the previous month."""
+    lower_quantile = round(1 - quantile, 10)  # 1 - 0.8 alone is 0.19999999999999996
+    scores = monthly_scores(df)
+    long_codes = {}
+    short_codes = {}
+
+    for j in progress(months):
+        df_change = scores.changes_in(j)
+
+        if dataset_name == "kr_finbert":
+            df_change = df_change[(df_change['pos_change'] < 10) & (df_change['neg_change'] < 10)]
+            df_month_pos_code = codes_at_or_above(df_change, 'pos_change', quantile)
+            df_month_neg_code = codes_at_or_above(df_change, 'neg_change', quantile)
+        else:
+            df_change = df_change[(df_change['pos_change'] < 10)]
+            df_month_pos_code = codes_at_or_above(df_change, 'pos_change', quantile)
+            df_month_neg_code = codes_at_or_below(df_change, 'pos_change', lower_quantile)
+
+        long_codes[j] = list(set(df_month_pos_code) - set(df_month_neg_code))
+        short_codes[j] = list(set(df_month_neg_code) - set(df_month_pos_code))
+
+    return long_codes, short_codes
+
+
+def incremental_long_only_selection(months, df, quantile=0.8):
+    """Selects, for each holding month, the codes whose score rose the most from the previous month."""
+    scores = monthly_scores(df)
+    long_codes = {}
+
+    for j in progress(months):
+        df_change = scores.changes_in(j)
+        df_change = df_change[(df_change['pos_change'] < 10)]
+        long_codes[j] = codes_at_or_above(df_change, 'pos_change', quantile)
+
+    return long_codes, None
+
+
+def static_long_only_selection(months, df, quantile=0.8):
+    """Selects, for each holding month, the codes with the highest scores in that month."""
+    scores = monthly_scores(df)
+    long_codes = {}
+
+    for j in progress(months):
+        long_codes[j] = codes_at_or_above(scores.month(j), 'pos_score', quantile)
+
+    return long_codes, None
+
+
+def static_long_short_selection(dataset_name, months, df, quantile=0.8):
+    """Selects, for each holding month, the codes with the highest (long) and lowest (short) scores in that month."""
+    lower_quantile = round(1 - quantile, 10)  # 1 - 0.8 alone is 0.19999999999999996
+    scores = monthly_scores(df)
+    long_codes = {}
+    short_codes = {}
+
+    for j in progress(months):
+        target_df = scores.month(j)
+
+        if dataset_name == "kr_finbert":
+            df_month_pos_code = codes_at_or_above(target_df, 'pos_score', quantile)
+            df_month_neg_code = codes_at_or_above(target_df, 'neg_score', quantile)
+        else:
+            df_month_pos_code = codes_at_or_above(target_df, 'pos_score', quantile)
+            df_month_neg_code = codes_at_or_below(target_df, 'pos_score', lower_quantile)
+
+        long_codes[j] = list(set(df_month_pos_code) - set(df_month_neg_code))
+        short_codes[j] = list(set(df_month_neg_code) - set(df_month_pos_code))
+
+    return long_codes, short_codes
+
+
+def incremental_long_short_portfolio(dataset_name, months, df, file_path=DATA_PATH, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8, checkpoint=None, workers=1):
+    long_codes, short_codes = incremental_long_short_selection(dataset_name, months[1:], df, quantile)
+    return monthly_portfolio_returns(months[1:], long_codes, short_codes, engine, transaction_cost, checkpoint=checkpoint, workers=workers)
+
+
+def incremental_long_only_portfolio(months, df, file_path= DATA_PATH, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8, checkpoint=None, workers=1):
+    long_codes, _ = incremental_long_only_selection(months[1:], df, quantile)
+    return monthly_portfolio_returns(months[1:], long_codes, None, engine, transaction_cost, checkpoint=checkpoint, workers=workers)
+
+
+def static_long_only_portfolio( months, df, file_path=DATA_PATH, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8, checkpoint=None, workers=1):
+    long_codes, _ = static_long_only_selection(months[1:], df, quantile)
+    return monthly_portfolio_returns(months[1:], long_codes, None, engine, transaction_cost, checkpoint=checkpoint, workers=workers)
+
+
+
+def static_long_short_portfolio(dataset_name, months, df, file_path=DATA_PATH, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8, checkpoint=None, workers=1):
+    long_codes, short_codes = static_long_short_selection(dataset_name, months[1:], df, quantile)
+    return monthly_portfolio_returns(months[1:], long_codes, short_codes, engine, transaction_cost, checkpoint=checkpoint, workers=workers)
+
+
+def run_strategy(strategy_name, dataset_name, months, df, engine='matrix', transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8, checkpoint=None,
+                 workers=1):
+    """
+    Runs one of STRATEGIES.
+
+    Args:
+    strategy_name (str): Name of the strategy.
+    dataset_name (str): Name of the score dataset; 'kr_finbert' also uses neg_score in the long-short strategies.
+    months (list): Months ('YYYY-MM'); the first one only provides scores.
+    df (pd.DataFrame): Date-indexed scores.
+    engine (str): Return engine, see monthly_portfolio_returns.
+    transaction_cost (float): Cost charged on entering a long position; short positions pay twice this.
+    quantile (float): Scores at or above this quantile are bought; long-short strategies short
+        scores at or below 1 - quantile.
+    checkpoint (Checkpoint): Store completed months here and only compute the months it lacks.
+    workers (int): Processes computing months in parallel, see monthly_portfolio_returns.
+
+    Returns:
+    dict: Month -> pd.Series of portfolio daily returns.
+    """
+    options = dict(engine=engine, transaction_cost=transaction_cost, quantile=quantile, checkpoint=checkpoint, workers=workers)
+    if strategy_name == 'incremental_long_short':
+        return incremental_long_short_portfolio(dataset_name, months, df, **options)
+    elif strategy_name == 'incremental_long_only':
+        return incremental_long_only_portfolio(months, df, **options)
+    elif strategy_name == 'static_long_short':
+        return static_long_short_portfolio(dataset_name, months, df, **options)
+    elif strategy_name == 'static_long_only':
+        return static_long_only_portfolio(months, df, **options)
+    raise ValueError(f"Strategy {strategy_name} is not recognized.")
+
+
+def select_codes(strategy_name, dataset_name, months, df, quantile=0.8):
+    """
+    Runs the selection step of one of STRATEGIES.
+
+    Args:
+    strategy_name (str): Name of the strategy.
+    dataset_name (str): Name of the score dataset.
+    months (list): Holding months ('YYYY-MM') to select codes for.
+    df (pd.DataFrame): Date-indexed scores.
+    quantile (float): Long quantile cutoff, see run_strategy.
+
+    Returns:
+    tuple: Month -> long codes, and month -> short codes (None for long-only strategies).
+    """
+    if strategy_name == 'incremental_long_short':
+        return incremental_long_short_selection(dataset_name, months, df, quantile)
+    elif strategy_name == 'incremental_long_only':
+        return incremental_long_only_selection(months, df, quantile)
+    elif strategy_name == 'static_long_short':
+        return static_long_short_selection(dataset_name, months, df, quantile)
+    elif strategy_name == 'static_long_only':
+        return static_long_only_selection(months, df, quantile)
+    raise ValueError(f"Strategy {strategy_name} is not recognized.")
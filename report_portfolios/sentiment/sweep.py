@@ -0,0 +1,33 @@
+from . import STRATEGIES
+from .. import sweep_results
+
+PACKAGE = 'sentiment'
+
+
+def portfolio_returns(params, df, months, checkpoint=None):
+    """Runs one (dataset, strategy, transaction_cost, quantile) combination and returns its daily portfolio returns."""
+    import pandas as pd
+    from .strategy import run_strategy
+    result = run_strategy(params['strategy'], params['dataset'], months, df,
+                          transaction_cost=params['transaction_cost'], quantile=params['quantile'], checkpoint=checkpoint)
+    return pd.concat(result.values()).sort_index()
+
+
+def sweep(datasets, strategies, transaction_costs, quantiles, max_workers=None, output_path='../sweep_results.csv',
+          checkpoint_path=None):
+    """Evaluates every combination of the grid on a process pool, see sweep_results.sweep."""
+    from .main import load_dataset
+    scores = {dataset_name: load_dataset(dataset_name) for dataset_name in datasets}
+    return sweep_results.sweep(PACKAGE, portfolio_returns, scores, strategies, transaction_costs, quantiles,
+                               max_workers, output_path, checkpoint_path)
+
+
+def cli(argv=None):
+    parser = sweep_results.build_sweep_parser('Evaluate every combination of datasets, strategies, transaction costs and quantiles.',
+                                              ['gpt', 'kobert', 'kr_finbert'], STRATEGIES)
+    args = parser.parse_args(argv)
+    print(sweep(args.datasets, args.strategies, args.transaction_costs, args.quantiles, args.workers, args.output, args.checkpoint).to_string(index=False))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,249 @@
+import argparse
+import logging
+from . import STRATEGIES
+from ..config import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_TRANSACTION_COST, DATA_PATH, FIRST_MONTH, END_MONTH, BENCHMARK_SYMBOLS
+from ..utils import month_range
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _candidates(strategy_name, dataset_name, scores, month):
+    """
+    Returns a month's candidate rows and how each leg ranks them, as the strategy selections do.
+
+    Returns:
+    tuple: Rows (code, values and n), the column ranked for the long leg, and the column ranked
+    for the short leg with 'high' (kr_finbert: highest neg values) or 'low' (lowest values of the
+    long column), or None for long-only strategies.
+    """
+    kr_finbert = dataset_name == 'kr_finbert'
+    if strategy_name.startswith('incremental'):
+        rows = scores.changes_in(month)
+        if strategy_name == 'incremental_long_short' and kr_finbert:
+            rows = rows[(rows['pos_change'] < 10) & (rows['neg_change'] < 10)]
+        else:
+            rows = rows[(rows['pos_change'] < 10)]
+        column, other = 'pos_change', 'neg_change'
+    else:
+        rows = scores.month(month)
+        column, other = 'pos_score', 'neg_score'
+    if strategy_name.endswith('long_only'):
+        return rows, column, None
+    return rows, column, (other, 'high') if kr_finbert else (column, 'low')
+
+
+def _weighted_quantiles(rows, column, quantiles):
+    """Returns the quantiles of a column over report rows, as codes_at_or_above computes them."""
+    import numpy as np
+    return np.quantile(np.repeat(rows[column].to_numpy(dtype=np.float64), rows['n'].to_numpy()), quantiles)
+
+
+def _prefix_sums(values):
+    """Returns the running sums over codes (axis 1) with a leading zero column, so [:, k] sums the first k codes."""
+    import numpy as np
+    return np.concatenate([np.zeros((len(values), 1)), np.cumsum(values, axis=1)], axis=1)
+
+
+def _leg(returns_sum, held_count, empty):
+    """Turns per-threshold sums over a leg's codes into leg returns: NaN on days none traded, 0 if the leg is empty."""
+    import numpy as np
+    with np.errstate(invalid='ignore', divide='ignore'):
+        leg = np.where(held_count > 0, returns_sum / held_count, np.nan)
+    return np.where(empty[:, None], 0.0, leg)
+
+
+def _month_block(month, dates, long_leg, long_empty, short_leg, short_empty, quantiles):
+    """
+    Returns a month's dates x quantiles portfolio returns from its quantiles x dates leg returns.
+
+    Cutoffs with an empty leg are filled as the strategies fill them (fill_empty_legs_of_month),
+    on every calendar day of the month; the other cutoffs are NaN on the days they have no return.
+    """
+    import numpy as np
+    import pandas as pd
+    from ..return_engine import fill_empty_legs_of_month
+    port = long_leg if short_leg is None else long_leg - short_leg
+    filled = long_empty if short_leg is None else long_empty | short_empty
+    block = pd.DataFrame(port.T, index=dates, columns=quantiles)
+    if not filled.any():
+        return block
+    columns = {}
+    for j in np.flatnonzero(filled):
+        legs = [None if long_empty[j] else pd.Series(long_leg[j], index=dates)]
+        if short_leg is not None:
+            legs.append(None if short_empty[j] else pd.Series(short_leg[j], index=dates))
+        columns[quantiles[j]] = fill_empty_legs_of_month(month, legs)
+    filled_block = pd.DataFrame(columns)
+    block = block.reindex(filled_block.index)
+    block[list(columns)] = filled_block
+    return block
+
+
+def threshold_returns(strategy_name, dataset_name, months, df, quantiles, transaction_cost=DEFAULT_TRANSACTION_COST, panel=None):
+    """
+    Computes a sentiment strategy's daily returns for many quantile cutoffs in one pass.
+
+    Each month's candidates are ranked once. The codes at or above a cutoff's upper quantile
+    are then the first k in that order and the codes at or below its lower quantile (1 - q)
+    the last k, so every cutoff's leg return on a day is read from running sums of the ranked
+    codes' returns instead of being selected and computed again. kr_finbert long-short
+    strategies rank neg scores for the short leg; their legs overlap in no fixed order, so they
+    are summed with a matrix product of selection masks instead.
+
+    Legs earn the returns of the matrix engine with the strategies' costs (short positions pay
+    twice transaction_cost). A leg that selects no code is filled as the strategies fill it: 0
+    on every calendar day from the first of the month to the first of the next month, so a
+    cutoff's returns are those of the strategy run at that quantile.
+
+    Args:
+    strategy_name (str): One of STRATEGIES.
+    dataset_name (str): Name of the score dataset.
+    months (list): Holding months ('YYYY-MM').
+    df (pd.DataFrame): Date-indexed scores.
+    quantiles (list): Long quantile cutoffs (the quantile argument of the strategies).
+    transaction_cost (float): Cost charged on entering a long position.
+    panel (PricePanel): Price panel; defaults to the panel under DATA_PATH.
+
+    Returns:
+    pd.DataFrame: Dates x quantiles daily portfolio returns (NaN on days without one); a date can
+    repeat where a filled month ends on the next month's first day, as in the strategies' returns.
+    """
+    import numpy as np
+    import pandas as pd
+    from ..price_panel import open_price_panel
+    from ..return_engine import code_daily_returns
+    from .score_aggregates import monthly_scores
+    if strategy_name not in STRATEGIES:
+        raise ValueError(f"Strategy {strategy_name} is not recognized.")
+    panel = open_price_panel(DATA_PATH) if panel is None else panel
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    lower_quantiles = np.round(1 - quantiles, 10)  # 1 - 0.8 alone is 0.19999999999999996
+    scores = monthly_scores(df)
+    candidates = {month: _candidates(strategy_name, dataset_name, scores, month) for month in months}
+
+    codes = sorted({code for rows, _, _ in candidates.values() for code in rows['code']} & set(panel.codes))
+    column_of = {code: i for i, code in enumerate(codes)}
+    dates, long_returns, held, month_of_row, _ = code_daily_returns(codes, months, panel, transaction_cost)
+    _, short_returns, _, _, _ = code_daily_returns(codes, months, panel, 2 * transaction_cost)
+
+    blocks = []
+    bounds = np.searchsorted(month_of_row, np.arange(len(months) + 1))
+    for i, month in enumerate(months):
+        rows, column, short = candidates[month]
+        days = slice(bounds[i], bounds[i + 1])
+        n_days = bounds[i + 1] - bounds[i]
+        if len(rows) == 0:
+            empty = np.ones(len(quantiles), dtype=bool)
+            long_leg = np.full((len(quantiles), n_days), np.nan)
+            blocks.append(_month_block(month, dates[days], long_leg, empty, None if short is None else long_leg, empty, quantiles))
+            continue
+
+        values = rows[column].to_numpy(dtype=np.float64)
+        order = np.argsort(-values, kind='stable')
+        # Codes without prices stay in the ranking with zero returns and are never counted as traded
+        positions = np.array([column_of.get(code, -1) for code in rows['code'].to_numpy()[order]])
+        priced = positions >= 0
+        month_held, month_long, month_short = held[days], long_returns[days], short_returns[days]
+
+        def ranked(matrix):
+            # Returns are already 0 where a code is not held, so they are summed as they are
+            out = np.zeros((n_days, len(order)))
+            out[:, priced] = matrix[:, positions[priced]]
+            return out
+
+        n_codes = len(values)
+        n_long = (values[:, None] >= _weighted_quantiles(rows, column, quantiles)).sum(axis=0)
+        if short is not None and short[1] == 'low':
+            n_short = (values[:, None] <= _weighted_quantiles(rows, column, lower_quantiles)).sum(axis=0)
+            # Codes in both legs are dropped from both: the long leg keeps the first codes up to
+            # the short leg's, and the short leg the last ones down to the long leg's
+            n_long, n_short = np.minimum(n_long, n_codes - n_short), np.minimum(n_short, n_codes - n_long)
+
+        short_leg = short_empty = None
+        if short is None or short[1] == 'low':
+            held_sums = _prefix_sums(ranked(month_held))
+            long_sums = _prefix_sums(ranked(month_long))
+            long_empty = n_long == 0
+            long_leg = _leg(long_sums[:, n_long].T, held_sums[:, n_long].T, long_empty)
+            if short is not None:
+                short_sums = _prefix_sums(ranked(month_short))
+                short_empty = n_short == 0
+                short_leg = _leg((short_sums[:, [n_codes]] - short_sums[:, n_codes - n_short]).T,
+                                 (held_sums[:, [n_codes]] - held_sums[:, n_codes - n_short]).T, short_empty)
+        else:
+            long_mask = values[:, None] >= _weighted_quantiles(rows, column, quantiles)
+            short_mask = rows[short[0]].to_numpy(dtype=np.float64)[:, None] >= _weighted_quantiles(rows, short[0], quantiles)
+            long_mask, short_mask = long_mask & ~short_mask, short_mask & ~long_mask
+            long_empty, short_empty = ~long_mask.any(axis=0), ~short_mask.any(axis=0)
+            ranked_held = ranked(month_held)
+            long_leg = _leg(long_mask[order].T.astype(float) @ ranked(month_long).T,
+                            long_mask[order].T.astype(float) @ ranked_held.T, long_empty)
+            short_leg = _leg(short_mask[order].T.astype(float) @ ranked(month_short).T,
+                             short_mask[order].T.astype(float) @ ranked_held.T, short_empty)
+        blocks.append(_month_block(month, dates[days], long_leg, long_empty, short_leg, short_empty, quantiles))
+
+    returns = pd.concat(blocks) if blocks else pd.DataFrame(columns=quantiles, dtype=np.float64)
+    returns.columns = pd.Index(quantiles, name='quantile')
+    return returns.dropna(how='all')
+
+
+def threshold_surface(strategy_name, dataset_name, months, df, quantiles, transaction_cost=DEFAULT_TRANSACTION_COST,
+                      kospi_daily_returns=None, panel=None):
+    """
+    Evaluates a sentiment strategy at every quantile cutoff.
+
+    Returns:
+    pd.DataFrame: The evaluate_portfolios table with one row per quantile (and a 'KOSPI' row, or
+    a row per column of a benchmark DataFrame, if kospi_daily_returns is given).
+    """
+    from ..evaluation import evaluate_portfolios
+    returns = threshold_returns(strategy_name, dataset_name, months, df, quantiles, transaction_cost, panel)
+    return evaluate_portfolios(returns, kospi_daily_returns)
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate sentiment strategies at many quantile cutoffs in one pass.')
+    parser.add_argument('--dataset_name', required=True, help='Name of the dataset (excluding .csv)')
+    parser.add_argument('--strategies', nargs='+', default=STRATEGIES, choices=STRATEGIES, help='Strategies to run')
+    parser.add_argument('--quantiles', nargs='+', type=float, default=[0.5, 0.6, 0.7, 0.8, 0.9], help='Long quantile cutoffs')
+    parser.add_argument('--grid', nargs=3, type=float, default=None, metavar=('START', 'STOP', 'STEP'),
+                        help='Use the cutoffs START, START + STEP, ... up to STOP instead of --quantiles, e.g. 0.5 0.99 0.01')
+    parser.add_argument('--transaction_cost', type=float, default=DEFAULT_TRANSACTION_COST, help='Transaction cost to be considered')
+    parser.add_argument('--no_kospi', action='store_true', help='Leave the benchmark rows out (no download)')
+    parser.add_argument('--benchmarks', nargs='+', default=['KOSPI'], choices=list(BENCHMARK_SYMBOLS), help='Benchmark indices to add as rows')
+    parser.add_argument('--output', default='../threshold_surface.csv', help='Surface table (strategy, quantile x metrics)')
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+    quantiles = args.quantiles
+    if args.grid is not None:
+        start, stop, step = args.grid
+        quantiles = np.round(np.arange(start, stop + step / 2, step), 10).tolist()
+    if not all(0 < q < 1 for q in quantiles):
+        parser.error("quantile cutoffs must be between 0 and 1")
+
+    from .main import load_dataset
+    from .strategy import get_price_data
+    df = load_dataset(args.dataset_name, DEFAULT_START_DATE, DEFAULT_END_DATE)
+    get_price_data(df['code'].unique())
+    kospi_daily_returns = None
+    if not args.no_kospi:
+        from ..benchmark_store import fetch_benchmark_data
+        kospi_daily_returns = fetch_benchmark_data(args.benchmarks, DEFAULT_START_DATE, DEFAULT_END_DATE)
+
+    # The first month only provides scores; codes are held from the second month on
+    months = month_range(FIRST_MONTH, END_MONTH)[1:]
+    surfaces = []
+    for strategy_name in args.strategies:
+        logging.info(f"Evaluating {strategy_name} at {len(quantiles)} cutoffs")
+        surface = threshold_surface(strategy_name, args.dataset_name, months, df, quantiles, args.transaction_cost, kospi_daily_returns)
+        surfaces.append(surface.reset_index().assign(strategy=strategy_name))
+    table = pd.concat(surfaces, ignore_index=True).rename(columns={'portfolio': 'quantile'})
+    table = table[['strategy', 'quantile'] + [c for c in table.columns if c not in ('strategy', 'quantile')]]
+    table.to_csv(args.output, index=False)
+    print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    cli()
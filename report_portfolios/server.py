@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .config import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_TRANSACTION_COST, SERVER_HOST, SERVER_PORT
+
+logging.basicConfig(level=logging.INFO)
+
+PACKAGES = ('sentiment', 'analyst')
+
+
+class BacktestService:
+    """
+    Keeps scores, the price panel, its trading calendar and KOSPI in memory and runs backtests against them.
+
+    Score files are loaded on first use and the price panel is opened once, so a backtest only
+    selects codes, computes returns and evaluates them. Before a backtest, at most every
+    check_interval seconds, the service checks whether a loaded score CSV or the price data has
+    changed on disk and reloads what changed.
+    """
+
+    def __init__(self, score_dir='./score', check_interval=2.0):
+        self.score_dir = score_dir
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self._scores = {}  # dataset -> (file size and modification time, scores)
+        self._kospi = {}  # (start_date, end_date) -> KOSPI daily returns
+        self._price_version = None
+        self._checked_at = 0.0
+        self.reloads = {'scores': 0, 'prices': 0}
+
+    def _score_path(self, dataset_name):
+        return os.path.join(self.score_dir, f'{dataset_name}.csv')
+
+    def _score_stat(self, dataset_name):
+        stat = os.stat(self._score_path(dataset_name))
+        return stat.st_size, stat.st_mtime_ns
+
+    def scores(self, dataset_name):
+        """Returns a dataset's scores, loading them and downloading missing prices the first time."""
+        if dataset_name not in self._scores:
+            self._load_scores(dataset_name)
+        return self._scores[dataset_name][1]
+
+    def _load_scores(self, dataset_name):
+        from .score_store import load_scores
+        from .prices import get_price_data
+        if os.path.basename(dataset_name) != dataset_name or not os.path.exists(self._score_path(dataset_name)):
+            raise ValueError(f"Dataset {dataset_name} not found in {self.score_dir}")
+        stat = self._score_stat(dataset_name)
+        df = load_scores(self._score_path(dataset_name))
+        get_price_data(sorted(set(df['code'])))
+        self._scores[dataset_name] = (stat, df)
+        logging.info(f"Loaded {dataset_name}: {len(df)} score rows")
+
+    def kospi(self, start_date, end_date):
+        from .evaluation import fetch_kospi_data
+        if (start_date, end_date) not in self._kospi:
+            self._kospi[start_date, end_date] = fetch_kospi_data(start_date, end_date)
+        return self._kospi[start_date, end_date]
+
+    def refresh(self, force=False):
+        """
+        Reloads the score files and the price panel that changed on disk since they were loaded.
+
+        Args:
+        force (bool): Check now even if the last check was less than check_interval seconds ago.
+
+        Returns:
+        dict: Reloaded 'datasets' and whether the 'prices' were reloaded.
+        """
+        from .checkpoint import price_version
+        from .price_panel import panel_is_stale, build_price_panel, reopen_price_panel
+        from .trading_calendar import trading_calendar
+        reloaded = {'datasets': [], 'prices': False}
+        if not force and time.monotonic() - self._checked_at < self.check_interval:
+            return reloaded
+        self._checked_at = time.monotonic()
+
+        for dataset_name, (stat, _) in list(self._scores.items()):
+            if not os.path.exists(self._score_path(dataset_name)):
+                logging.warning(f"Score file of {dataset_name} was removed; keeping the loaded scores")
+            elif self._score_stat(dataset_name) != stat:
+                logging.info(f"{self._score_path(dataset_name)} changed; reloading it")
+                self._load_scores(dataset_name)
+                reloaded['datasets'].append(dataset_name)
+                self.reloads['scores'] += 1
+
+        codes = set()
+        for _, df in self._scores.values():
+            codes.update(df['code'].unique())
+        if codes and panel_is_stale(sorted(codes)):
+            logging.info("Price CSVs changed; rebuilding the price panel")
+            build_price_panel()
+        version = price_version()
+        if version != self._price_version:
+            if self._price_version is not None:
+                logging.info("Price panel changed; reopening it")
+                reloaded['prices'] = True
+                self.reloads['prices'] += 1
+                self._kospi.clear()
+            # The price cache and the trading calendar follow the reopened panel by themselves
+            trading_calendar(reopen_price_panel())
+            self._price_version = version
+        return reloaded
+
+    def backtest(self, dataset, strategy, package='sentiment', transaction_cost=DEFAULT_TRANSACTION_COST, quantile=0.8,
+                 start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE, cost_model='flat', engine='matrix', returns=False):
+        """
+        Runs one backtest as the package's main.py would and evaluates it.
+
+        Args:
+        dataset (str): Name of the score dataset in score_dir (excluding .csv).
+        strategy (str): One of the package's STRATEGIES.
+        package (str): 'sentiment' or 'analyst'.
+        transaction_cost (float): Transaction cost, as --transaction_cost.
+        quantile (float): Long quantile cutoff of the sentiment strategies.
+        start_date (str): First date of the scores (sentiment) and of KOSPI; months start at its month.
+        end_date (str): Last date of the scores (sentiment) and of KOSPI; months end at its month.
+        cost_model (str): 'flat' or 'turnover'.
+        engine (str): 'matrix' or 'per_code'.
+        returns (bool): Also return the daily portfolio returns.
+
+        Returns:
+        dict: evaluate_portfolio metrics under 'metrics', with 'dates' and 'returns' lists if asked for.
+        """
+        import pandas as pd
+        from .evaluation import evaluate_portfolio
+        from .utils import month_range
+        if package not in PACKAGES:
+            raise ValueError(f"Package {package} is not recognized.")
+        self.refresh()
+        df = self.scores(dataset)
+        months = month_range(start_date[:7], end_date[:7])
+
+        if package == 'sentiment':
+            from .sentiment.strategy import select_codes, monthly_portfolio_returns
+            df = df[(df.index >= start_date) & (df.index <= end_date)]
+            long_codes, short_codes = select_codes(strategy, dataset, months[1:], df, quantile)
+            monthly_returns = monthly_portfolio_returns(months[1:], long_codes, short_codes, engine, transaction_cost, cost_model)
+            port_daily_returns = pd.concat(monthly_returns.values()).sort_index()
+        else:
+            from .analyst.strategy import generate_buy_signals, compute_daily_returns
+            signal = generate_buy_signals(strategy, df)
+            port_daily_returns = compute_daily_returns(signal, months, transaction_cost, engine, cost_model)
+
+        metrics = evaluate_portfolio(port_daily_returns, self.kospi(start_date, end_date), dataset, verbose=False)
+        result = {'metrics': {name: float(value) for name, value in metrics.items()}}
+        if returns:
+            result['dates'] = port_daily_returns.index.strftime('%Y-%m-%d').tolist()
+            result['returns'] = port_daily_returns.astype(float).tolist()
+        return result
+
+    def status(self):
+        return {'status': 'ok', 'datasets': sorted(self._scores), 'price_version': self._price_version, 'reloads': self.reloads}
+
+
+class BacktestHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints of a BacktestService:
+    GET /health, POST /backtest with the keyword arguments of BacktestService.backtest, and POST /reload.
+    """
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._send(200, self.server.service.status())
+        else:
+            self._send(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Expected a JSON object")
+            # One request at a time: the price cache and score aggregates are shared process-wide
+            with service.lock:
+                started = time.perf_counter()
+                if self.path.rstrip('/') == '/backtest':
+                    body = service.backtest(**request)
+                elif self.path.rstrip('/') == '/reload':
+                    body = service.refresh(force=True)
+                else:
+                    self._send(404, {'error': f"Unknown path {self.path}"})
+                    return
+                body['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': str(e)})
+            return
+        except Exception as e:
+            logging.exception("Backtest failed")
+            self._send(500, {'error': str(e)})
+            return
+        self._send(200, body)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+def serve(service, host=SERVER_HOST, port=SERVER_PORT):
+    """Serves a BacktestService over HTTP until interrupted."""
+    server = ThreadingHTTPServer((host, port), BacktestHandler)
+    server.service = service
+    logging.info(f"Serving backtests on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Serve backtests from memory over local HTTP, reloading scores and prices when their files change.')
+    parser.add_argument('--host', default=SERVER_HOST, help='Address to listen on (local only by default)')
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help='Port to listen on')
+    parser.add_argument('--score_dir', default='./score', help='Directory of the score CSVs')
+    parser.add_argument('--datasets', nargs='*', default=[], help='Datasets to load before the first request')
+    parser.add_argument('--check_interval', type=float, default=2.0, help='Seconds between checks for changed score and price files')
+    args = parser.parse_args(argv)
+
+    service = BacktestService(args.score_dir, args.check_interval)
+    for dataset_name in args.datasets:
+        service.scores(dataset_name)
+    service.refresh(force=True)
+    serve(service, args.host, args.port)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,314 @@
+"""
+Confidence intervals and p-values for portfolio metrics by resampling.
+
+block_bootstrap resamples the daily returns of several portfolios (and KOSPI) jointly in
+blocks of consecutive days, so that differences between them keep their correlation and
+short-range autocorrelation. random_portfolio_test compares a strategy with portfolios that
+hold the same number of randomly drawn codes each month.
+
+Replications are drawn in batches of batch_size as NumPy arrays and the batches are spread
+over a process pool. Each batch has its own seed spawned from seed, so the results depend on
+seed, n_replications and batch_size but not on the number of workers.
+"""
+import argparse
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from .config import DATA_PATH
+
+logging.basicConfig(level=logging.INFO)
+
+METRICS = ['annualized_return', 'sharpe_ratio']
+
+_worker_state = {}
+
+
+def annualized_metrics(values, num_years):
+    """
+    Computes the annualised return and Sharpe ratio of returns along the second-to-last axis.
+
+    The definitions are those of evaluate_portfolio: growth from the first to the last day
+    (so the first day's return is not compounded) annualised over num_years, divided by the
+    annualised standard deviation of the daily returns. NaN returns are skipped.
+
+    Args:
+    values (np.ndarray): (..., days, portfolios) daily returns.
+    num_years (float): Span of the returns in years.
+
+    Returns:
+    tuple: Annualised returns and Sharpe ratios, shaped (..., portfolios).
+    """
+    import numpy as np
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth = np.nansum(np.log1p(values[..., 1:, :]), axis=-2)
+        annualized_return = np.exp(growth / num_years) - 1
+        volatility = np.nanstd(values, axis=-2, ddof=1) * np.sqrt(252)
+        return annualized_return, annualized_return / volatility
+
+
+def _init_worker(state):
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def _run_batches(batch_function, state, n_replications, batch_size, seed, max_workers):
+    """Runs batch_function over batches of replications, in this process if max_workers is 1, and concatenates its outputs."""
+    import numpy as np
+    sizes = [min(batch_size, n_replications - start) for start in range(0, n_replications, batch_size)]
+    tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    if max_workers == 1 or len(tasks) <= 1:
+        _init_worker(state)
+        outputs = [batch_function(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(state,)) as executor:
+            outputs = list(executor.map(batch_function, tasks))
+    return [np.concatenate(parts) for parts in zip(*outputs)]
+
+
+def _bootstrap_batch(task):
+    """Draws one batch of circular block bootstrap samples and returns their metrics."""
+    import numpy as np
+    seed_sequence, size = task
+    prefix, block_length, num_years = _worker_state['prefix'], _worker_state['block_length'], _worker_state['num_years']
+    n_days, n_series = (len(prefix) - 1) // 2, prefix.shape[1] // 3
+    n_blocks = -(-n_days // block_length)
+    rng = np.random.default_rng(seed_sequence)
+    block_starts = rng.integers(0, n_days, size=(size, n_blocks))
+    # Blocks are consecutive days, so each one's sums of log1p(r), r and r ** 2 are differences of
+    # prefix sums over the returns repeated twice; the last block is cut to n_days in total
+    lengths = np.full(n_blocks, block_length)
+    lengths[-1] = n_days - (n_blocks - 1) * block_length
+    sums = (prefix[block_starts + lengths] - prefix[block_starts]).sum(axis=1)
+
+    first_day = prefix[block_starts[:, 0] + 1, :n_series] - prefix[block_starts[:, 0], :n_series]
+    log_growth = sums[:, :n_series] - first_day  # the first day is not compounded
+    mean = sums[:, n_series:2 * n_series] / n_days
+    variance = np.maximum(sums[:, 2 * n_series:] - n_days * mean ** 2, 0) / (n_days - 1)
+    annualized_return = np.exp(log_growth / num_years) - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return annualized_return, annualized_return / (np.sqrt(variance) * np.sqrt(252))
+
+
+def _summary(estimate, samples, confidence):
+    """Returns the estimate, percentile interval and two-sided p-value of the null that the metric is 0."""
+    import numpy as np
+    alpha = (1 - confidence) / 2
+    samples = samples[~np.isnan(samples)]
+    if len(samples) == 0:
+        return {'estimate': estimate, 'ci_low': np.nan, 'ci_high': np.nan, 'p_value': np.nan, 'replications': 0}
+    # Centering the samples on the estimate imposes the null that the metric is 0
+    extreme = np.abs(samples - estimate) >= np.abs(estimate)
+    return {
+        'estimate': estimate,
+        'ci_low': np.quantile(samples, alpha),
+        'ci_high': np.quantile(samples, 1 - alpha),
+        'p_value': (1 + extreme.sum()) / (1 + len(samples)),
+        'replications': len(samples),
+    }
+
+
+def block_bootstrap(port_daily_returns, kospi_daily_returns=None, n_replications=10000, block_length=20, seed=0,
+                    max_workers=None, batch_size=1000, confidence=0.95):
+    """
+    Bootstraps the metrics of several portfolios and of their pairwise differences.
+
+    The returns are aligned on the dates they all have and resampled together in circular
+    blocks of block_length days, so each replication gives every portfolio's metrics on the
+    same days. Differences are taken within each replication.
+
+    Args:
+    port_daily_returns (dict): Name -> pd.Series of daily returns (e.g. 'gpt', 'kobert', 'analyst').
+    kospi_daily_returns (pd.Series): Benchmark daily returns, added as 'KOSPI'; None leaves it out.
+    n_replications (int): Number of bootstrap samples.
+    block_length (int): Days per resampled block.
+    seed (int): Seed of the random draws.
+    max_workers (int): Worker processes (default: number of CPUs; 1 runs in this process).
+    batch_size (int): Replications drawn per batch.
+    confidence (float): Coverage of the percentile intervals.
+
+    Returns:
+    pd.DataFrame: Rows indexed by (comparison, metric), where comparison is a portfolio name or
+    'A - B'; columns estimate, ci_low, ci_high, p_value (two-sided, of the null that the metric
+    or difference is 0) and replications.
+    """
+    import numpy as np
+    import pandas as pd
+    series = dict(port_daily_returns)
+    if kospi_daily_returns is not None:
+        series['KOSPI'] = kospi_daily_returns
+    names = list(series)
+    aligned = pd.concat([s.groupby(level=0).last() for s in series.values()], axis=1, keys=names, join='inner').dropna()
+    if len(aligned) < 2:
+        raise ValueError("The portfolios share fewer than two days of returns")
+    values = aligned.to_numpy(dtype=np.float64)
+    num_years = (aligned.index[-1] - aligned.index[0]).days / 365.25
+    logging.info(f"Bootstrapping {len(names)} series over {len(aligned)} common days, {n_replications} replications")
+
+    terms = np.hstack([np.log1p(values), values, values ** 2])
+    prefix = np.vstack([np.zeros((1, terms.shape[1])), np.cumsum(np.vstack([terms, terms]), axis=0)])
+    state = {'prefix': prefix, 'block_length': block_length, 'num_years': num_years}
+    samples = dict(zip(METRICS, _run_batches(_bootstrap_batch, state, n_replications, batch_size, seed, max_workers)))
+    estimates = dict(zip(METRICS, (m[0] for m in annualized_metrics(values[None], num_years))))
+
+    rows = {}
+    for metric in METRICS:
+        for i, name in enumerate(names):
+            rows[(name, metric)] = _summary(estimates[metric][i], samples[metric][:, i], confidence)
+        for i, j in itertools.combinations(range(len(names)), 2):
+            rows[(f'{names[i]} - {names[j]}', metric)] = _summary(estimates[metric][i] - estimates[metric][j],
+                                                                  samples[metric][:, i] - samples[metric][:, j],
+                                                                  confidence)
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.names = ['comparison', 'metric']
+    return table
+
+
+def _random_portfolio_batch(task):
+    """Draws one batch of random portfolios and returns their metrics."""
+    import numpy as np
+    seed_sequence, size = task
+    rng = np.random.default_rng(seed_sequence)
+    state = _worker_state
+    port = []
+    for month in state['months']:
+        n_long, n_short = month['n_long'], month['n_short']
+        # One permutation per portfolio: its first n_long codes are bought and the next n_short sold short
+        order = np.argsort(rng.random((size, len(month['codes']))), axis=1)
+        legs = []
+        for leg, n in (('long', n_long), ('short', n_short)):
+            if n == 0:
+                legs.append(np.zeros((size, month['held'].shape[0])))
+                continue
+            chosen = np.zeros((size, len(month['codes'])))
+            np.put_along_axis(chosen, order[:, :n] if leg == 'long' else order[:, n_long:n_long + n], 1.0, axis=1)
+            held_count = chosen @ month['held'].T
+            with np.errstate(invalid='ignore', divide='ignore'):
+                legs.append(np.where(held_count > 0, (chosen @ month[f'{leg}_returns'].T) / held_count, 0.0))
+        port.append(legs[0] - legs[1])
+    values = np.concatenate(port, axis=1)[:, :, None]
+    return tuple(metric[:, 0] for metric in annualized_metrics(values, state['num_years']))
+
+
+def random_portfolio_test(strategy_metrics, months, long_codes, short_codes=None, universe=None, long_cost=0.0, short_cost=0.0,
+                          n_replications=10000, seed=0, max_workers=None, batch_size=500, panel=None):
+    """
+    Compares a strategy with random portfolios that hold as many codes as it does each month.
+
+    Each month a random portfolio buys (and, for long-short strategies, sells short) codes
+    drawn uniformly from the universe codes that can be held that month, as many as the
+    strategy selected. Positions earn the returns of the matrix engine, with the same costs.
+    A leg that holds nothing, or none of whose codes traded on a day, returns 0 that day.
+
+    Args:
+    strategy_metrics (dict): The strategy's 'annualized_return' and 'sharpe_ratio'.
+    months (list): Holding months ('YYYY-MM').
+    long_codes (dict): Month -> codes the strategy bought.
+    short_codes (dict): Month -> codes it sold short, or None for long-only strategies.
+    universe (iterable): Codes to draw from (default: every code in the price panel).
+    long_cost (float): Cost on the first-day returns of long positions.
+    short_cost (float): Cost on the first-day returns of short positions.
+    n_replications (int): Number of random portfolios.
+    seed (int): Seed of the random draws.
+    max_workers (int): Worker processes (default: number of CPUs; 1 runs in this process).
+    batch_size (int): Random portfolios drawn per batch.
+    panel (PricePanel): Price panel; defaults to the panel under DATA_PATH.
+
+    Returns:
+    pd.DataFrame: One row per metric with the strategy's value, the mean and standard deviation
+    of the random portfolios, the share of random portfolios below the strategy (percentile) and
+    the one-sided p-value of the strategy doing no better than random.
+    """
+    import numpy as np
+    import pandas as pd
+    from .price_panel import open_price_panel
+    from .return_engine import code_daily_returns
+    panel = open_price_panel(DATA_PATH) if panel is None else panel
+    codes = sorted(set(universe if universe is not None else panel.codes) & set(panel.codes))
+    dates, long_returns, held, month_of_row, eligible = code_daily_returns(codes, months, panel, long_cost)
+    _, short_returns, _, _, _ = code_daily_returns(codes, months, panel, short_cost)
+
+    bounds = np.searchsorted(month_of_row, np.arange(len(months) + 1))
+    state_months = []
+    for i, month in enumerate(months):
+        candidates = np.flatnonzero(eligible[i])
+        rows = slice(bounds[i], bounds[i + 1])
+        n_long = min(len(set(long_codes.get(month, []))), len(candidates))
+        n_short = min(len(set(short_codes.get(month, []))), len(candidates) - n_long) if short_codes is not None else 0
+        state_months.append({
+            'codes': candidates,
+            'n_long': n_long,
+            'n_short': n_short,
+            'held': held[rows][:, candidates].astype(np.float64),
+            'long_returns': long_returns[rows][:, candidates],
+            'short_returns': short_returns[rows][:, candidates],
+        })
+    if len(dates) < 2:
+        raise ValueError("The months hold fewer than two trading days")
+    num_years = (dates[-1] - dates[0]).days / 365.25
+    logging.info(f"Drawing {n_replications} random portfolios from {len(codes)} codes over {len(months)} months")
+
+    state = {'months': state_months, 'num_years': num_years}
+    samples = dict(zip(METRICS, _run_batches(_random_portfolio_batch, state, n_replications, batch_size, seed, max_workers)))
+
+    rows = {}
+    for metric in METRICS:
+        value, random = strategy_metrics[metric], samples[metric][~np.isnan(samples[metric])]
+        rows[metric] = {
+            'strategy': value,
+            'random_mean': random.mean() if len(random) else np.nan,
+            'random_std': random.std(ddof=1) if len(random) > 1 else np.nan,
+            'percentile': (random < value).mean() if len(random) else np.nan,
+            'p_value': (1 + (random >= value).sum()) / (1 + len(random)),
+        }
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'metric'
+    return table
+
+
+def read_daily_returns(path):
+    """Reads a 'Date,return' CSV written with --save_returns into a date-indexed Series."""
+    import pandas as pd
+    return pd.read_csv(path, parse_dates=['Date'], index_col='Date')['return']
+
+
+def write_daily_returns(port_daily_returns, path):
+    """Writes daily returns to a 'Date,return' CSV for block_bootstrap runs."""
+    port_daily_returns.rename('return').rename_axis('Date').to_csv(path, header=True)
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals and p-values of portfolio metrics and their differences.')
+    parser.add_argument('--returns', nargs='+', required=True, metavar='NAME=PATH',
+                        help='Daily returns CSVs written by main.py --save_returns, e.g. gpt=../sentiment_score_portfolios/gpt.csv')
+    parser.add_argument('--no_kospi', action='store_true', help='Do not compare against KOSPI')
+    parser.add_argument('--replications', type=int, default=10000, help='Number of bootstrap samples')
+    parser.add_argument('--block_length', type=int, default=20, help='Trading days per resampled block')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Coverage of the confidence intervals')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random draws')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--output', default=None, help='Also write the table to this CSV')
+    args = parser.parse_args(argv)
+
+    port_daily_returns = {}
+    for spec in args.returns:
+        name, _, path = spec.partition('=')
+        if not path:
+            parser.error(f"--returns expects NAME=PATH, got {spec}")
+        port_daily_returns[name] = read_daily_returns(path)
+
+    kospi_daily_returns = None
+    if not args.no_kospi:
+        from .evaluation import fetch_kospi_data
+        start = min(s.index.min() for s in port_daily_returns.values())
+        end = max(s.index.max() for s in port_daily_returns.values())
+        kospi_daily_returns = fetch_kospi_data(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+
+    table = block_bootstrap(port_daily_returns, kospi_daily_returns, args.replications, args.block_length, args.seed,
+                            args.workers, confidence=args.confidence)
+    print(table.to_string())
+    if args.output:
+        table.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,123 @@
+import os
+import argparse
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from .config import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_TRANSACTION_COST, FIRST_MONTH, END_MONTH, CHECKPOINT_PATH
+
+logging.basicConfig(level=logging.INFO)
+
+RESULT_KEYS = ['package', 'dataset', 'strategy', 'transaction_cost', 'quantile']
+
+_worker_state = {}
+
+
+def write_results(rows, output_path):
+    """Merges rows into the results table at output_path, replacing rows with the same RESULT_KEYS."""
+    import pandas as pd
+    results = pd.DataFrame(rows)
+    if os.path.exists(output_path):
+        previous = pd.read_csv(output_path, dtype={'dataset': str, 'strategy': str})
+        results = pd.concat([previous, results], ignore_index=True)
+    results = results.drop_duplicates(subset=RESULT_KEYS, keep='last').sort_values(RESULT_KEYS)
+    results.to_csv(output_path, index=False)
+    return results
+
+
+def _init_worker(state):
+    from .price_panel import open_price_panel
+    open_price_panel()
+    _worker_state.update(state)
+
+
+def _combination_checkpoint(params, checkpoints):
+    """Returns the checkpoint of a combination from (directory, dataset -> score fingerprint, price version)."""
+    from .checkpoint import Checkpoint
+    path, fingerprints, prices = checkpoints
+    return Checkpoint(fingerprints[params['dataset']], params, prices, path)
+
+
+def run_combination(params):
+    """Runs one combination of the grid with the family's portfolio_returns and returns its result row."""
+    from .evaluation import evaluate_portfolio
+    row = dict(params)
+    checkpoint = _combination_checkpoint(params, _worker_state['checkpoints']) if _worker_state['checkpoints'] is not None else None
+    try:
+        port_daily_returns = _worker_state['portfolio_returns'](params, _worker_state['datasets'][params['dataset']],
+                                                               _worker_state['months'], checkpoint)
+        row.update(evaluate_portfolio(port_daily_returns, _worker_state['kospi_daily_returns'], params['dataset'], verbose=False))
+    except Exception as e:
+        row['error'] = str(e)
+    else:
+        if checkpoint is not None:
+            checkpoint.save_result(row)
+    return row
+
+
+def sweep(package, portfolio_returns, scores, strategies, transaction_costs, quantiles, max_workers=None,
+          output_path='../sweep_results.csv', checkpoint_path=None):
+    """
+    Evaluates every combination of the grid on a process pool.
+
+    Prices and KOSPI are loaded once in this process; workers receive the scores when they
+    start and map the shared price panel instead of reading prices again. With a
+    checkpoint_path, every combination stores its finished months and result row there:
+    combinations already finished for the same scores and prices are taken from it, and an
+    interrupted one resumes from its stored months.
+
+    Args:
+    package (str): Name of the strategy family, stored in the 'package' column.
+    portfolio_returns (callable): Module-level function of (params, scores, months, checkpoint)
+        returning a combination's daily portfolio returns.
+    scores (dict): Dataset name -> date-indexed scores.
+    strategies, transaction_costs, quantiles (list): Values of the grid.
+    max_workers (int): Worker processes (default: number of CPUs).
+    output_path (str): Results table; rows of other runs are kept.
+    checkpoint_path (str): Checkpoint directory, or None to run every combination.
+
+    Returns:
+    pd.DataFrame: The consolidated results table.
+    """
+    from .checkpoint import score_fingerprint, price_version
+    from .evaluation import fetch_kospi_data
+    from .prices import get_price_data
+    from .utils import month_range
+    os.environ.setdefault('TQDM_DISABLE', '1')  # inherited by the workers, so they neither import tqdm nor draw progress bars
+
+    codes = sorted(set().union(*(set(df['code']) for df in scores.values())))
+    get_price_data(codes)
+    months = month_range(FIRST_MONTH, END_MONTH)
+    kospi_daily_returns = fetch_kospi_data(DEFAULT_START_DATE, DEFAULT_END_DATE)
+
+    grid = [dict(zip(RESULT_KEYS, values))
+            for values in itertools.product([package], scores, strategies, transaction_costs, quantiles)]
+    checkpoints = None
+    rows = [None] * len(grid)
+    if checkpoint_path:
+        checkpoints = (checkpoint_path, {dataset_name: score_fingerprint(df) for dataset_name, df in scores.items()}, price_version())
+        rows = [_combination_checkpoint(params, checkpoints).load_result() for params in grid]
+    pending = [i for i, row in enumerate(rows) if row is None]
+    logging.info(f"Running {len(pending)} combinations ({len(grid) - len(pending)} taken from checkpoints)")
+    if pending:
+        state = dict(portfolio_returns=portfolio_returns, datasets=scores, months=months,
+                     kospi_daily_returns=kospi_daily_returns, checkpoints=checkpoints)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(state,)) as executor:
+            for i, row in zip(pending, executor.map(run_combination, [grid[i] for i in pending])):
+                rows[i] = row
+
+    return write_results(rows, output_path)
+
+
+def build_sweep_parser(description, default_datasets, strategies, quantiles=True):
+    """Returns the command line of a family's sweep; quantiles=False leaves out --quantiles."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--datasets', nargs='+', default=default_datasets, help='Names of the datasets (excluding .csv)')
+    parser.add_argument('--strategies', nargs='+', default=strategies, choices=strategies, help='Strategies to run')
+    parser.add_argument('--transaction_costs', nargs='+', type=float, default=[DEFAULT_TRANSACTION_COST], help='Transaction costs to run')
+    if quantiles:
+        parser.add_argument('--quantiles', nargs='+', type=float, default=[0.8], help='Long quantile cutoffs to run')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--checkpoint', nargs='?', const=CHECKPOINT_PATH, default=None,
+                        help=f'Store finished combinations in this directory and skip them on the next run (default: {CHECKPOINT_PATH})')
+    parser.add_argument('--output', default='../sweep_results.csv', help='Results table; rows of other runs are kept')
+    return parser
@@ -0,0 +1,58 @@
+import weakref
+import numpy as np
+import pandas as pd
+from .config import DATA_PATH
+from .price_panel import open_price_panel
+from .utils import month_id, month_label
+
+# Keyed weakly by panel, so a panel that was reopened or rebuilt is freed together with its calendar
+_calendars = weakref.WeakKeyDictionary()
+
+
+class TradingCalendar:
+    """
+    Row positions of every month in a sorted index of trading days.
+
+    Months are numbered with utils.month_id, so finding a month's rows is integer arithmetic
+    on one precomputed array instead of parsing dates or slicing by date strings. Months
+    before the first or after the last trading day map to empty ranges at either end.
+    """
+
+    def __init__(self, dates):
+        self.dates = pd.DatetimeIndex(dates)
+        if len(self.dates) == 0:
+            self.first_month = 0
+            self.month_starts = np.zeros(1, dtype=np.intp)
+            return
+        self.first_month = month_id(self.dates[0])
+        # month_starts[k] is the first row on or after the first day of month first_month + k;
+        # the extra entry closes the last month
+        month_firsts = pd.to_datetime([f'{month_label(m)}-01' for m in range(self.first_month, month_id(self.dates[-1]) + 2)])
+        self.month_starts = np.searchsorted(self.dates.values, month_firsts.values.astype(self.dates.values.dtype))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def bounds(self, month):
+        """Returns the [start, end) row positions of a month ('YYYY-MM')."""
+        offset = month_id(month) - self.first_month
+        last = len(self.month_starts) - 1
+        return int(self.month_starts[min(max(offset, 0), last)]), int(self.month_starts[min(max(offset + 1, 0), last)])
+
+    def prev_close(self, month):
+        """Returns the row of the last trading day before the month, or -1 if there is none."""
+        return self.bounds(month)[0] - 1
+
+    def bounds_array(self, months):
+        """Returns the start and end rows of several months as two integer arrays."""
+        offsets = np.array([month_id(month) for month in months], dtype=np.intp) - self.first_month
+        last = len(self.month_starts) - 1
+        return self.month_starts[np.clip(offsets, 0, last)], self.month_starts[np.clip(offsets + 1, 0, last)]
+
+
+def trading_calendar(panel=None):
+    """Returns the calendar of a price panel's trading days (the panel under DATA_PATH by default), built once per panel."""
+    panel = open_price_panel(DATA_PATH) if panel is None else panel
+    if panel not in _calendars:
+        _calendars[panel] = TradingCalendar(panel.dates)
+    return _calendars[panel]
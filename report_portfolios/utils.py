@@ -0,0 +1,39 @@
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+def mkdir(name):
+    try:
+        os.mkdir(name)
+        logging.info(f"Directory {name} created successfully!")
+    except Exception as e:
+        logging.error(f"Error creating directory {name}: {str(e)}")
+        return False
+    return True
+
+def month_id(time_point):
+    """Returns year * 12 + month - 1 of a 'YYYY-MM[-DD]' string or a date, so months become consecutive integers."""
+    text = str(time_point)
+    return int(text[:4]) * 12 + int(text[5:7]) - 1
+
+def month_label(month_number):
+    """Returns the 'YYYY-MM' label of a month_id."""
+    return f'{month_number // 12:04d}-{month_number % 12 + 1:02d}'
+
+def prev_month(time_point):
+    return month_label(month_id(time_point) - 1)
+
+def next_month(time_point):
+    return month_label(month_id(time_point) + 1)
+
+def month_range(first_month, end_month):
+    """Returns the months ('YYYY-MM') from first_month up to, but excluding, end_month."""
+    return [month_label(month_number) for month_number in range(month_id(first_month), month_id(end_month))]
+
+def progress(iterable):
+    """Wraps iterable in a tqdm progress bar; tqdm is only imported here, and not at all when TQDM_DISABLE is set."""
+    if os.environ.get('TQDM_DISABLE'):
+        return iterable
+    from tqdm import tqdm
+    return tqdm(iterable)
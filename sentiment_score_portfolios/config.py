@@ -1,4 +0,0 @@
-DEFAULT_START_DATE = '2016-01-29'
-DEFAULT_END_DATE = '2023-03-01'
-DEFAULT_TRANSACTION_COST = 0.0005
-DATA_PATH = './price_data'